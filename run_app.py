@@ -1,4 +1,7 @@
 """A wrapper script to launch the entire email assistant application."""
+import os
+import select
+import signal
 import subprocess
 import sys
 import time
@@ -11,6 +14,114 @@ logger.add(
     format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <level>{message}</level>",
 )
 
+SHUTDOWN_GRACE_SECONDS = 4.0
+NOTIFY_FD_ENV = "EMAIL_APP_NOTIFY_FD"  # read by src/utils/notify.py in both children
+WAKE_FD_ENV = "EMAIL_APP_WAKE_FD"
+
+
+def _returncode_from_waitid(info: os.waitid_result) -> int:
+    """Translate a waitid() result into Popen.returncode semantics (-N for signals)."""
+    if info.si_code == os.CLD_EXITED:
+        return info.si_status
+    return -info.si_status
+
+
+def _wait_with_pidfds(processes: list[subprocess.Popen]) -> None:
+    """Block in the kernel until a child exits (Linux >= 5.3, Python >= 3.9).
+
+    Each child gets a pidfd registered on a single epoll set, so the wrapper
+    wakes exactly once per exit event instead of once per second, no matter
+    how many children it supervises. Ready pidfds are reaped with
+    waitid(P_PIDFD) and the status is recorded on the matching Popen.
+    """
+    ep = select.epoll()
+    fd_to_proc: dict[int, subprocess.Popen] = {}
+    try:
+        for p in processes:
+            fd = os.pidfd_open(p.pid)
+            fd_to_proc[fd] = p
+            ep.register(fd, select.EPOLLIN)
+
+        while fd_to_proc:
+            for fd, _ in ep.poll(-1):
+                info = os.waitid(os.P_PIDFD, fd, os.WEXITED | os.WNOHANG)
+                if info is None:  # spurious wakeup, child still running
+                    continue
+                p = fd_to_proc.pop(fd)
+                ep.unregister(fd)
+                os.close(fd)
+                # We reaped the child ourselves, so tell Popen what happened
+                p.returncode = ret = _returncode_from_waitid(info)
+                if ret != 0:
+                    logger.error(f"Process {p.args} exited with code {ret}. Shutting down others.")
+                    raise KeyboardInterrupt
+    finally:
+        for fd in fd_to_proc:
+            os.close(fd)
+        ep.close()
+
+
+def _wait_with_polling(processes: list[subprocess.Popen]) -> None:
+    """Portable fallback: check every child once per second."""
+    while True:
+        # If any process exits unexpectedly, break
+        for p in processes:
+            ret = p.poll()
+            if ret is not None and ret != 0:
+                logger.error(f"Process {p.args} exited with code {ret}. Shutting down others.")
+                raise KeyboardInterrupt
+        time.sleep(1)
+
+
+def _signal_group(p: subprocess.Popen, sig: signal.Signals) -> None:
+    """Send `sig` to the child's whole process group (it leads its own session)."""
+    try:
+        os.killpg(p.pid, sig)
+    except ProcessLookupError:
+        pass  # group already gone
+
+
+def _wait_for_exit(processes: list[subprocess.Popen], timeout: float) -> None:
+    """Wait up to `timeout` seconds for all still-running children to exit."""
+    deadline = time.monotonic() + timeout
+    pending = [p for p in processes if p.poll() is None]
+    if hasattr(os, "pidfd_open"):
+        poller = select.poll()
+        fd_to_proc: dict[int, subprocess.Popen] = {}
+        try:
+            for p in pending:
+                try:
+                    fd = os.pidfd_open(p.pid)
+                except ProcessLookupError:
+                    continue
+                fd_to_proc[fd] = p
+                poller.register(fd, select.POLLIN)
+            while fd_to_proc:
+                remaining_ms = int((deadline - time.monotonic()) * 1000)
+                if remaining_ms <= 0:
+                    break
+                for fd, _ in poller.poll(remaining_ms):
+                    fd_to_proc.pop(fd).poll()  # reap
+                    poller.unregister(fd)
+                    os.close(fd)
+            return
+        except OSError:
+            pass  # no pidfd support; fall through to Popen.wait
+        finally:
+            for fd in fd_to_proc:
+                os.close(fd)
+    for p in pending:
+        try:
+            p.wait(timeout=max(0.0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            pass
+
+
+def _raise_keyboard_interrupt(signum, frame) -> None:
+    # Route SIGTERM (systemd/docker stop) through the same path as Ctrl+C
+    raise KeyboardInterrupt
+
+
 def main() -> None:
     # Commands as arg lists (no shell=True)
     commands: list[list[str]] = [
@@ -18,39 +129,61 @@ def main() -> None:
         ["python", "src/send_worker.py"],
     ]
 
+    # Two eventfds shared by both children: the worker bumps NOTIFY after
+    # recording deliveries and the UI wakes on it, instead of re-reading db.json
+    # to notice; the UI bumps WAKE after scheduling so the worker stops sleeping.
+    env = os.environ.copy()
+    pass_fds: tuple[int, ...] = ()
+    if hasattr(os, "eventfd"):
+        try:
+            notify_fd = os.eventfd(0)
+            wake_fd = os.eventfd(0)
+        except OSError:
+            pass  # kernel/sandbox without eventfd: pages refresh on interaction, worker polls
+        else:
+            env[NOTIFY_FD_ENV] = str(notify_fd)
+            env[WAKE_FD_ENV] = str(wake_fd)
+            pass_fds = (notify_fd, wake_fd)
+
     processes: list[subprocess.Popen] = []
     for cmd in commands:
-        p = subprocess.Popen(cmd)  # inherits stdio
+        # Children inherit our stdout/stderr directly. Never pass stdout=PIPE /
+        # stderr=PIPE here without draining them: nothing reads those pipes, so
+        # once ~64 KiB of log output piles up the child blocks on write and the
+        # whole app stalls.
+        # Each child also leads its own session/process group, so shutdown can
+        # reach any grandchildren it spawns, not just the direct child.
+        p = subprocess.Popen(cmd, start_new_session=True, env=env, pass_fds=pass_fds)
         processes.append(p)
 
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+
     logger.info("Successfully launched Streamlit UI and background worker.")
     logger.info("Press Ctrl+C in this terminal to shut down all processes.")
 
     try:
         # Keep the wrapper alive while children run
-        while True:
-            # If any process exits unexpectedly, break
-            for p in processes:
-                ret = p.poll()
-                if ret is not None and ret != 0:
-                    logger.error(f"Process {p.args} exited with code {ret}. Shutting down others.")
-                    raise KeyboardInterrupt
-            time.sleep(1)
+        if hasattr(os, "pidfd_open") and hasattr(select, "epoll"):
+            try:
+                _wait_with_pidfds(processes)
+            except OSError:
+                # Kernel without pidfd support (< 5.3) or a sandbox that blocks it
+                _wait_with_polling(processes)
+        else:
+            _wait_with_polling(processes)
     except KeyboardInterrupt:
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)  # don't interrupt our own teardown
         logger.warning("Shutdown signal received. Terminating all processes...")
         for p in processes:
-            try:
-                p.terminate()
-            except Exception:
-                pass
-        # Grace period
-        time.sleep(2)
-        for p in processes:
-            if p.poll() is None:
-                try:
-                    p.kill()
-                except Exception:
-                    pass
+            _signal_group(p, signal.SIGTERM)
+        # Grace period: returns as soon as every child is gone
+        _wait_for_exit(processes, SHUTDOWN_GRACE_SECONDS)
+        survivors = [p for p in processes if p.poll() is None]
+        for p in survivors:
+            logger.warning(f"Process {p.args} ignored SIGTERM; sending SIGKILL.")
+            _signal_group(p, signal.SIGKILL)
+        for p in survivors:
+            p.wait()
         logger.success("All processes terminated gracefully.")
 
 if __name__ == "__main__":
@@ -11,7 +11,8 @@ This module renders the main dashboard with:
 It relies on:
 - `utils.db.DatabaseHandler` (TinyDB) as the persistence layer.
 - `utils.time` for timezone-aware conversions between stored UTC ISO strings and local time.
-- `utils.ui` for the settings sidebar.
+- `utils.ui` for the settings sidebar and the shared delivery-log rendering.
+- `utils.cache` for rerun-persistent table reads keyed on the DB's data version.
 
 Notes
 -----
@@ -25,19 +26,29 @@ from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any
 
+import numpy as np
 import streamlit as st
 
+from utils.cache import (
+    STATUS_CODES,
+    get_db,
+    load_deliveries,
+    load_email_arrays,
+    load_emails,
+    load_recipient_labels,
+    search_sent_emails,
+)
 from utils.db import DatabaseHandler
-from utils.time import get_app_tz, parse_iso_to_local
-from utils.ui import render_settings_sidebar
+from utils.time import date_to_epoch, get_app_tz, parse_iso_to_local
+from utils.ui import display_delivery_log, enable_live_refresh, render_settings_sidebar, status_badge
 
 Document = dict[str, Any]
 
+DATE_FMT = "%b %d, %Y"
+
 st.set_page_config(page_title="Email Assistant Dashboard", page_icon="👋", layout="wide")
 
-if "db_handler" not in st.session_state:
-    st.session_state.db_handler = DatabaseHandler(db_file="db.json")
-db: DatabaseHandler = st.session_state.db_handler
+db: DatabaseHandler = get_db()
 
 # Apply saved TZ + sidebar
 tz_saved = db.get_timezone()
@@ -45,6 +56,7 @@ if tz_saved:
     from utils.time import set_runtime_tz
     set_runtime_tz(tz_saved)
 render_settings_sidebar(db)
+enable_live_refresh()
 
 st.title("👋 Welcome to your AI Email Assistant!")
 
@@ -63,9 +75,11 @@ st.sidebar.success("Select a page above to get started.")
 st.markdown("This is your central dashboard for managing your professional outreach.")
 st.divider()
 
-all_emails: list[Document] = db.emails_table.all()
-all_profiles: list[Document] = db.get_all_profiles()
-profile_id_map: dict[int, Document] = {p.doc_id: p for p in all_profiles}
+# Every widget interaction reruns this script; reuse parsed rows until db.json changes
+version = db.data_version()
+all_emails: list[Document] = load_emails(db, version)
+# Only names are rendered, so map doc_id -> name directly (one lookup per recipient)
+recipient_labels: dict[int, str] = load_recipient_labels(db, version)
 
 now_local: datetime = datetime.now(get_app_tz())
 thirty_days_ago: datetime = now_local - timedelta(days=30)
@@ -85,114 +99,68 @@ def dt_local(s: str | None) -> datetime | None:
     """
     return parse_iso_to_local(s)
 
-sent_emails = [e for e in all_emails if e.get("status") == "sent"]
-partial_emails = [e for e in all_emails if e.get("status") == "partial"]
-failed_emails = [e for e in all_emails if e.get("status") == "failed"]
-scheduled_emails = [e for e in all_emails if e.get("status") == "scheduled"]
-
-sent_last_30_days = [e for e in sent_emails if (dt := dt_local(e.get("sent_time"))) and dt >= thirty_days_ago]
-scheduled_count = len(scheduled_emails)
-
-upcoming_reminders = [
-    e for e in all_emails
-    if e.get("reminder_date")
-    and datetime.fromisoformat(e["reminder_date"]).date() >= now_local.date()
-]
-partial_last_30_days = [e for e in partial_emails if (dt := dt_local(e.get("sent_time"))) and dt >= thirty_days_ago]
-failed_last_30_days = [e for e in failed_emails if (dt := dt_local(e.get("sent_time"))) and dt >= thirty_days_ago]
+# Aggregates are masked sums over the cached column arrays (one C-level pass each)
+arrays = load_email_arrays(db, version)
+status_codes, sent_epochs = arrays["status"], arrays["sent_epoch"]
+recent_mask = sent_epochs >= int(thirty_days_ago.timestamp())
+completed_mask = np.isin(status_codes, [STATUS_CODES[s] for s in ("sent", "partial", "failed")])
+scheduled_count = int(np.count_nonzero(status_codes == STATUS_CODES["scheduled"]))
+upcoming_reminders = int(np.count_nonzero(arrays["reminder_epoch"] >= date_to_epoch(now_local.date())))
+sent_last_30_days = int(np.count_nonzero((status_codes == STATUS_CODES["sent"]) & recent_mask))
+partial_last_30_days = int(np.count_nonzero((status_codes == STATUS_CODES["partial"]) & recent_mask))
+failed_last_30_days = int(np.count_nonzero((status_codes == STATUS_CODES["failed"]) & recent_mask))
 
 st.header("📊 Dashboard")
 st.subheader("At a Glance")
 col1, col2, col3, col4, col5 = st.columns(5)
-with col1: st.metric("Emails Sent (Last 30 Days)", len(sent_last_30_days))
+with col1: st.metric("Emails Sent (Last 30 Days)", sent_last_30_days)
 with col2: st.metric("Emails Scheduled", scheduled_count)
-with col3: st.metric("Upcoming Reminders", len(upcoming_reminders))
-with col4: st.metric("Partial (Last 30 Days)", len(partial_last_30_days))
-with col5: st.metric("Failed (Last 30 Days)", len(failed_last_30_days))
+with col3: st.metric("Upcoming Reminders", upcoming_reminders)
+with col4: st.metric("Partial (Last 30 Days)", partial_last_30_days)
+with col5: st.metric("Failed (Last 30 Days)", failed_last_30_days)
 st.divider()
 
-def status_badge(status: str) -> str:
-    """Return a small Markdown badge for a campaign status.
+def log_toggle_key(section: str, email: Document) -> str:
+    """Widget key of a campaign's "Show delivery log" toggle within a list section."""
+    return f"{section}_log_open_{email.doc_id}"
 
-    Parameters
-    ----------
-    status : str
-        One of {"sent", "partial", "failed", "scheduled"} (case-insensitive). Any other
-        string is returned in bold without an icon.
+def display_email_entry(
+    email: Document,
+    recipient_labels: dict[int, str],
+    section: str,
+    deliveries_by_campaign: dict[int, list[Document]],
+) -> None:
+    """Render a single campaign entry with recipients, subject, status, body expander and log toggle.
 
-    Returns
-    -------
-    str
-        A Markdown-formatted string with an icon + bolded status label.
-    """
-    s = (status or "").lower()
-    return {"sent":"✅ **sent**","partial":"🟡 **partial**","failed":"❌ **failed**","scheduled":"🕒 **scheduled**"}.get(s, f"**{status}**")
-
-def display_delivery_log(email: Document) -> None:
-    """Render the per-recipient delivery log for a campaign.
-
-    This function looks up all deliveries tied to the given campaign (email),
-    sorts them by last attempt (or sent time), and prints a compact list with
-    recipient, status, timestamp (local), and error (if any).
-
-    Parameters
-    ----------
-    email : dict[str, Any]
-        The campaign document (row from `emails` table) whose deliveries should be displayed.
-
-    Returns
-    -------
-    None
-        This function renders directly to the Streamlit app.
-    """
-    deliveries = db.get_deliveries_for_campaign(email.doc_id)
-    if not deliveries:
-        st.info("No delivery entries for this campaign yet.")
-        return
-    st.write("**Delivery log:**")
-    # Show in attempt order (by last_attempt/sent_time)
-    deliveries_sorted = sorted(
-        deliveries,
-        key=lambda d: d.get("last_attempt") or d.get("sent_time") or "",
-    )
-    for row in deliveries_sorted:
-        snap = row.get("recipient_snapshot") or {}
-        rname = snap.get("name") or "Unknown"
-        remail = row.get("recipient_email") or "—"
-        rstatus = row.get("status", "—")
-        rtime_local = dt_local(row.get("sent_time") or row.get("last_attempt"))
-        rtime_str = rtime_local.strftime("%Y-%m-%d %H:%M") if rtime_local else "—"
-        rerr = row.get("error") or "—"
-        st.markdown(
-            f"- `{rname}` <{remail}> — **{rstatus}** at `{rtime_str}`"
-            + (f" · error: `{rerr}`" if rerr and rerr != "—" else ""),
-        )
-
-def display_email_entry(email: Document, profile_map: dict[int, Document]) -> None:
-    """Render a single campaign entry with recipients, subject, status, and body/log expanders.
+    Delivery logs are only fetched for toggles that are switched on; Streamlit runs
+    collapsed expander bodies on every rerun, so an expander would not defer the query.
 
     Parameters
     ----------
     email : dict[str, Any]
         The campaign (row from `emails` table) to display.
-    profile_map : dict[int, dict[str, Any]]
-        Mapping from profile doc_id to profile document; used to show recipient names.
+    recipient_labels : dict[int, str]
+        Mapping from campaign doc_id to its joined recipient names (see `load_recipient_labels`).
+    section : str
+        Name of the list being rendered (e.g. "search", "recent"); keeps widget keys
+        unique when the same campaign appears in more than one list.
+    deliveries_by_campaign : dict[int, list[dict[str, Any]]]
+        Prefetched deliveries of every campaign whose log toggle is on.
 
     Returns
     -------
     None
         This function renders directly to the Streamlit app.
     """
-    # Build recipient names from profiles for quick glance
-    recipient_ids: list[int] = email.get("recipients", [])
-    recipient_names: list[str] = [profile_map.get(rid, {}).get("name", "Unknown") for rid in recipient_ids]
-    counts = email.get("counts", {}) or {}
-    sent_c, failed_c, pending_c, total_c = counts.get("sent", 0), counts.get("failed", 0), counts.get("pending", 0), counts.get("total", len(recipient_ids))
+    # Recipient names for quick glance, joined once per data version
+    recipients_label = recipient_labels.get(email.doc_id, "")
+    # Flat count columns are materialized on every campaign write (see utils.db._flat_counts)
+    sent_c, failed_c, pending_c, total_c = email["sent_c"], email["failed_c"], email["pending_c"], email["total_c"]
 
     with st.container(border=True):
         c1, c2, c3 = st.columns([4,2,2])
         with c1:
-            st.markdown(f"**To:** `{', '.join(recipient_names)}`")
+            st.markdown(f"**To:** `{recipients_label}`")
             st.markdown(f"**Subject:** {email.get('subject', 'No Subject')}")
         with c2:
             st.markdown(f"Status: {status_badge(email.get('status'))}")
@@ -201,33 +169,51 @@ def display_email_entry(email: Document, profile_map: dict[int, Document]) -> No
             label = ""
             if email.get("status") in ("sent", "partial", "failed"):
                 dt = dt_local(email.get("sent_time"))
-                label = f"Completed: {dt.strftime('%b %d, %Y')}" if dt else ""
+                label = f"Completed: {dt.strftime(DATE_FMT)}" if dt else ""
             elif email.get("status") == "scheduled":
                 dt = dt_local(email.get("schedule_time"))
-                label = f"Sends: {dt.strftime('%b %d, %Y')}" if dt else ""
+                label = f"Sends: {dt.strftime(DATE_FMT)}" if dt else ""
             if label: st.write(label)
 
         with st.expander("View Body"):
             st.text(email.get("body", "No content available."))
-        with st.expander("Delivery Log"):
-            display_delivery_log(email)
+        if st.toggle("Show delivery log", key=log_toggle_key(section, email)):
+            display_delivery_log(deliveries_by_campaign.get(email.doc_id, []), log_toggle_key(section, email))
 
 st.subheader("Search Sent Emails")
 search_query: str = st.text_input("Search by keyword in subject or body", key="search_home", label_visibility="collapsed")
+# Any other widget on the page triggers a rerun too; only hit the DB when the
+# query text or the database file actually changed.
+results = search_sent_emails(db, search_query.strip(), version) if search_query else []
+
+# Top 5 completed by sent time: O(N) argpartition, then sort just those 5
+completed_pos = np.flatnonzero(completed_mask)
+k = min(5, completed_pos.size)
+if k < completed_pos.size:
+    completed_pos = completed_pos[np.argpartition(-sent_epochs[completed_pos], k - 1)[:k]]
+recent_completed = [all_emails[i] for i in completed_pos[np.argsort(-sent_epochs[completed_pos], kind="stable")]]
+
+# Toggle values are in session_state before their widgets render, so the logs
+# switched on in either list can be fetched together in one deliveries pass.
+open_log_ids = sorted({
+    e.doc_id
+    for section, emails in (("search", results), ("recent", recent_completed))
+    for e in emails
+    if st.session_state.get(log_toggle_key(section, e))
+})
+deliveries_by_campaign = load_deliveries(db, tuple(open_log_ids), version) if open_log_ids else {}
+
 if search_query:
-    results = db.search_emails(search_query)
     st.write(f"Found **{len(results)}** result(s) for '{search_query}':")
     if not results:
         st.info("No matching emails found.")
     else:
         for e in results:
-            display_email_entry(e, profile_id_map)
+            display_email_entry(e, recipient_labels, "search", deliveries_by_campaign)
 
 st.subheader("🕒 Recent Activity (Last 5 Completed)")
-completed = [e for e in all_emails if e.get("status") in ("sent", "partial", "failed")]
-sorted_completed = sorted(completed, key=lambda e: e.get("sent_time", ""), reverse=True)
-if not sorted_completed:
+if not recent_completed:
     st.info("No completed emails yet.")
 else:
-    for email in sorted_completed[:5]:
-        display_email_entry(email, profile_id_map)
+    for email in recent_completed:
+        display_email_entry(email, recipient_labels, "recent", deliveries_by_campaign)
@@ -1,15 +1,12 @@
 import streamlit as st
 
+from utils.cache import get_db, load_profiles
 from utils.time import set_runtime_tz
 from utils.ui import render_settings_sidebar
 
 st.set_page_config(page_title="Contact Profiles", page_icon="👥")
 
-if "db_handler" not in st.session_state:
-    st.error("Database handler not initialized. Please go to the Home page first.")
-    st.stop()
-
-db = st.session_state.db_handler
+db = get_db()
 
 # TZ + settings sidebar
 tz_saved = db.get_timezone()
@@ -44,29 +41,42 @@ with st.expander("➕ Add New Profile", expanded=False):
 st.write("---")
 st.subheader("Existing Profiles")
 
-all_profiles = db.get_all_profiles()
+# Cached per data version: reruns from selection clicks reuse the parsed list,
+# while any write (ours or the worker's) changes the version and reloads it.
+all_profiles = load_profiles(db, db.data_version())
 
 if not all_profiles:
     st.info("No profiles found. Add a new profile using the form above.")
 else:
-    col1, col2, col3, col4, col5 = st.columns([2, 3, 2, 2, 1])
-    with col1: st.write("**Name**")
-    with col2: st.write("**Email**")
-    with col3: st.write("**Title**")
-    with col4: st.write("**Profession**")
-    with col5: st.write("**Actions**")
-
-    st.markdown("---")
-
-    for profile in all_profiles:
-        profile_id = profile.doc_id
-        col1, col2, col3, col4, col5 = st.columns([2, 3, 2, 2, 1])
-
-        with col1: st.write(profile.get("name", "N/A"))
-        with col2: st.write(profile.get("email", "N/A"))
-        with col3: st.write(profile.get("title", "N/A"))
-        with col4: st.write(profile.get("profession", "N/A"))
-        with col5:
-            if st.button("🗑️", key=f"delete_{profile_id}", help="Delete this profile"):
-                db.delete_profile(profile_id)
+    # One editor for the whole list inside a form: ticking rows does not rerun
+    # the script, and the ticked profiles are deleted together on submit.
+    # The editor keeps its ticks by row position, so each row carries its
+    # doc_id in a hidden column and the selection is read back from that.
+    rows = [
+        {
+            "id": p.doc_id,
+            "Delete": False,
+            "Name": p.get("name", "N/A"),
+            "Email": p.get("email", "N/A"),
+            "Title": p.get("title", "N/A"),
+            "Profession": p.get("profession", "N/A"),
+        }
+        for p in all_profiles
+    ]
+    with st.form("profiles_bulk"):
+        edited = st.data_editor(
+            rows,
+            hide_index=True,
+            use_container_width=True,
+            column_config={"id": None},
+            disabled=["id", "Name", "Email", "Title", "Profession"],
+            key="profiles_editor",
+        )
+        if st.form_submit_button("🗑️ Delete selected", help="Delete the ticked profiles"):
+            selected = [row["id"] for row in edited if row["Delete"]]
+            if selected:
+                db.delete_profiles(selected)
+                # Drop the ticks too, or they would land on the rows that moved up
+                st.session_state.pop("profiles_editor", None)
                 st.rerun()
+            st.warning("Tick the profiles to delete first.")
@@ -1,15 +1,12 @@
 import streamlit as st
 
+from utils.cache import get_db, load_templates
 from utils.time import set_runtime_tz
 from utils.ui import render_settings_sidebar
 
 st.set_page_config(page_title="Email Templates", page_icon="📝")
 
-if "db_handler" not in st.session_state:
-    st.error("Database handler not initialized. Please go to the Home page first.")
-    st.stop()
-
-db = st.session_state.db_handler
+db = get_db()
 
 # TZ + settings sidebar
 tz_saved = db.get_timezone()
@@ -55,18 +52,21 @@ Best,
 st.write("---")
 st.subheader("Saved Templates")
 
-all_templates = db.get_all_templates()
+all_templates = load_templates(db, db.data_version())
 
 if not all_templates:
     st.info("No templates found. Create a new template using the form above.")
 else:
     for template in all_templates:
-        template_id = template.doc_id
         with st.expander(f"**{template.get('name')}**"):
             st.write(f"**Subject:** {template.get('subject')}")
             st.markdown("**Body:**")
             st.code(template.get("body"), language="text")
 
-            if st.button("🗑️ Delete Template", key=f"delete_template_{template_id}", help="Delete this template"):
-                db.delete_template(template_id)
-                st.rerun()
+    # Deletions are picked in one form and applied together on submit
+    with st.form("templates_bulk"):
+        template_ids_by_name = {t.get("name"): t.doc_id for t in all_templates}
+        to_delete = st.multiselect("Templates to delete", options=list(template_ids_by_name))
+        if st.form_submit_button("🗑️ Delete selected") and to_delete:
+            db.delete_templates(template_ids_by_name[n] for n in to_delete)
+            st.rerun()
@@ -1,10 +1,20 @@
 import datetime
 import os
+import re
+import shutil
 import uuid
+from pathlib import Path
 
 import streamlit as st
 
-from utils.helpers import render_email_body
+from utils.cache import (
+    get_db,
+    load_recipient_options,
+    load_template_map,
+    load_user_profile,
+    render_preview,
+)
+from utils.helpers import sender_placeholders
 from utils.time import set_runtime_tz
 from utils.ui import render_settings_sidebar
 
@@ -12,10 +22,7 @@ from utils.ui import render_settings_sidebar
 st.set_page_config(page_title="Compose & Send", page_icon="✉️", layout="wide")
 
 # --- Init DB handler ---
-if "db_handler" not in st.session_state:
-    st.error("Database handler not initialized. Please go to the Home page first.")
-    st.stop()
-db = st.session_state.db_handler
+db = get_db()
 
 # --- Settings sidebar & timezone (requires db) ---
 tz_saved = db.get_timezone()
@@ -24,30 +31,36 @@ if tz_saved:
 render_settings_sidebar(db)
 
 # --- Attachments setup ---
-ATTACHMENTS_DIR = "attachments"
-if not os.path.exists(ATTACHMENTS_DIR):
-    os.makedirs(ATTACHMENTS_DIR)
+@st.cache_resource(show_spinner=False)
+def ensure_attachments_dir(path: str = "attachments") -> str:
+    """Create the attachments folder once per process, not on every rerun."""
+    Path(path).mkdir(parents=True, exist_ok=True)
+    return path
+
+ATTACHMENTS_DIR = ensure_attachments_dir()
+_UNSAFE_FILENAME_RE = re.compile(r"[^A-Za-z0-9._-]+")  # uploaded names are user-supplied
 
 # --- Data Loading ---
 st.title("✉️ Compose & Send")
 st.write("Select recipients, choose a template or write a custom email, and schedule it for sending.")
-all_profiles = db.get_all_profiles()
-all_templates = db.get_all_templates()
-my_profile = db.get_user_profile()
+version = db.data_version()
+# Option label -> (tab label, profile), and name -> template: built once per data version
+profile_map_by_name = load_recipient_options(db, version)
+template_map = load_template_map(db, version)
+my_profile = load_user_profile(db, version)
 
-if not all_profiles or not my_profile:
+if not profile_map_by_name or not my_profile:
     st.warning("Please ensure both contact profiles and your own profile are set up before composing.")
     st.stop()
 
-profile_map_by_name = {f"{p['name']} ({p['email']})": p for p in all_profiles}
-template_map = {t["name"]: t for t in all_templates}
+# {my_*} placeholder values, shared by every preview tab
+sender_fields = sender_placeholders(my_profile)
+
 template_names = ["-- Write from scratch --"] + list(template_map.keys())
 
 # --- Session State ---
-if "email_subject" not in st.session_state:
-    st.session_state.email_subject = ""
-if "email_body" not in st.session_state:
-    st.session_state.email_body = ""
+st.session_state.setdefault("email_subject", "")
+st.session_state.setdefault("email_body", "")
 
 def on_template_change():
     selected_template_name = st.session_state.get("template_selector", "-- Write from scratch --")
@@ -59,42 +72,51 @@ def on_template_change():
         st.session_state.email_subject = ""
         st.session_state.email_body = ""
 
-# --- SECTION 1: CORE EMAIL CONTENT (REACTIVE) ---
-st.selectbox("Select a Template (Optional)", options=template_names, key="template_selector", on_change=on_template_change)
-selected_profile_names = st.multiselect("Select Recipients", options=list(profile_map_by_name.keys()))
-st.text_input("Subject", key="email_subject")
-st.write("---")
-
-# --- SECTION 2: EDITOR AND PREVIEW (REACTIVE) ---
-col1, col2 = st.columns(2)
-with col1:
-    st.subheader("Email Editor")
-    st.text_area("Body", height=450, key="email_body")
-    add_signature = st.toggle("Add signature to email", value=True)
-    uploaded_files = st.file_uploader("Attach files", accept_multiple_files=True)
-with col2:
-    st.subheader("Live Preview")
-    if not selected_profile_names:
-        st.info("Select one or more recipients to see a live preview.")
-    else:
-        tab_names = [name.split(" (")[0].strip() for name in selected_profile_names]
-        recipient_tabs = st.tabs(tab_names)
-        for i, tab in enumerate(recipient_tabs):
-            with tab:
-                current_recipient_name = selected_profile_names[i]
-                current_recipient_profile = profile_map_by_name[current_recipient_name]
-                preview_content = render_email_body(
-                    body_template=st.session_state.email_body,
-                    recipient_profile=current_recipient_profile,
-                    sender_profile=my_profile,
-                    include_signature=add_signature,
-                )
-                st.markdown(f"**To:** {current_recipient_profile['name']} <{current_recipient_profile['email']}>")
-                st.markdown(f"**Subject:** {st.session_state.email_subject}")
-                st.divider()
-                with st.container(border=True, height=450):
-                    st.text(preview_content)
-
+@st.fragment
+def compose_editor() -> None:
+    """Sections 1-2: content inputs and the live preview.
+
+    Runs as a fragment, so picking recipients or editing reruns only this block,
+    not the data loading above. A text_area commits its value on blur (or
+    Ctrl+Enter), not per keystroke, so the preview already re-renders once per
+    edit; it is not a form, so the action buttons always see the current body.
+    Values the action form needs are read back from session_state by widget key.
+    """
+    # --- SECTION 1: CORE EMAIL CONTENT (REACTIVE) ---
+    st.selectbox("Select a Template (Optional)", options=template_names, key="template_selector", on_change=on_template_change)
+    selected_profile_names = st.multiselect("Select Recipients", options=list(profile_map_by_name.keys()), key="recipients")
+    st.text_input("Subject", key="email_subject")
+    st.write("---")
+
+    # --- SECTION 2: EDITOR AND PREVIEW (REACTIVE) ---
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Email Editor")
+        st.text_area("Body", height=450, key="email_body")
+        add_signature = st.toggle("Add signature to email", value=True, key="add_signature")
+        st.file_uploader("Attach files", accept_multiple_files=True, key="attachments")
+    with col2:
+        st.subheader("Live Preview")
+        if not selected_profile_names:
+            st.info("Select one or more recipients to see a live preview.")
+        else:
+            selected = [profile_map_by_name[name] for name in selected_profile_names]
+            recipient_tabs = st.tabs([tab_name for tab_name, _ in selected])
+            for tab, (_, current_recipient_profile) in zip(recipient_tabs, selected):
+                with tab:
+                    preview_content = render_preview(
+                        st.session_state.email_body,
+                        current_recipient_profile,
+                        sender_fields,
+                        add_signature,
+                    )
+                    st.markdown(f"**To:** {current_recipient_profile['name']} <{current_recipient_profile['email']}>")
+                    st.markdown(f"**Subject:** {st.session_state.email_subject}")
+                    st.divider()
+                    with st.container(border=True, height=450):
+                        st.text(preview_content)
+
+compose_editor()
 st.write("---")
 
 # --- SECTION 3: SCHEDULING AND REMINDERS (REACTIVE) ---
@@ -128,19 +150,24 @@ with st.form("action_form"):
     if schedule_button or send_now_button:
         subject = st.session_state.email_subject
         body = st.session_state.email_body
+        selected_profile_names = st.session_state.recipients
+        add_signature = st.session_state.add_signature
+        uploaded_files = st.session_state.attachments
         if not selected_profile_names or not subject or not body:
             st.error("Please select recipients and ensure the subject and body are not empty.")
         else:
             attachment_paths = []
             if uploaded_files:
                 for uploaded_file in uploaded_files:
-                    unique_filename = f"{uuid.uuid4()}_{uploaded_file.name}"
+                    safe_name = _UNSAFE_FILENAME_RE.sub("_", uploaded_file.name)
+                    unique_filename = f"{uuid.uuid4().hex}_{safe_name}"
                     save_path = os.path.join(ATTACHMENTS_DIR, unique_filename)
+                    uploaded_file.seek(0)  # previews/reruns may have read it already
                     with open(save_path, "wb") as f:
-                        f.write(uploaded_file.getbuffer())
+                        shutil.copyfileobj(uploaded_file, f, 1024 * 1024)
                     attachment_paths.append(save_path)
 
-            recipient_doc_ids = [profile_map_by_name[name].doc_id for name in selected_profile_names]
+            recipient_doc_ids = [profile_map_by_name[name][1].doc_id for name in selected_profile_names]
 
             if send_now_button:
                 schedule_datetime = datetime.datetime.now()
@@ -1,26 +1,25 @@
-import os
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Any
 
 import streamlit as st
 
-from utils.time import get_app_tz, parse_iso_to_local, set_runtime_tz
-from utils.ui import render_settings_sidebar
+from utils.cache import get_db, load_deliveries, load_recent_completed, load_recipient_labels, load_scheduled
+from utils.helpers import attachment_name
+from utils.time import get_app_tz, set_runtime_tz
+from utils.ui import display_delivery_log, enable_live_refresh, render_settings_sidebar, status_badge
 
 # Page config must be first
 st.set_page_config(page_title="Email Schedule", page_icon="🗓️", layout="wide")
 
 # Init DB
-if "db_handler" not in st.session_state:
-    st.error("Database handler not initialized. Please go to the Home page first.")
-    st.stop()
-db = st.session_state.db_handler
+db = get_db()
 
 # TZ + settings
 tz_saved = db.get_timezone()
 if tz_saved:
     set_runtime_tz(tz_saved)
 render_settings_sidebar(db)
+enable_live_refresh()
 
 st.title("🗓️ Email Schedule")
 st.write("View all your scheduled emails. The sending process happens in the background.")
@@ -28,137 +27,120 @@ st.divider()
 
 Document = dict[str, Any]
 
-def status_badge(status: str) -> str:
-    s = (status or "").lower()
-    return {
-        "sent": "✅ **sent**",
-        "partial": "🟡 **partial**",
-        "failed": "❌ **failed**",
-        "scheduled": "🕒 **scheduled**",
-    }.get(s, f"**{status}**")
-
-def dt_local(s: str | None) -> datetime | None:
-    return parse_iso_to_local(s)
-
-def display_delivery_log(email: Document) -> None:
-    deliveries = db.get_deliveries_for_campaign(email.doc_id)
-    if not deliveries:
-        st.info("No delivery entries for this campaign yet.")
-        return
-    st.write("**Delivery log:**")
-    deliveries_sorted = sorted(
-        deliveries,
-        key=lambda d: d.get("last_attempt") or d.get("sent_time") or "",
-    )
-    for row in deliveries_sorted:
-        snap = row.get("recipient_snapshot") or {}
-        rname = snap.get("name") or "Unknown"
-        remail = row.get("recipient_email") or "—"
-        rstatus = row.get("status", "—")
-        rtime_local = dt_local(row.get("sent_time") or row.get("last_attempt"))
-        rtime_str = rtime_local.strftime("%Y-%m-%d %H:%M") if rtime_local else "—"
-        rerr = row.get("error") or "—"
-        st.markdown(
-            f"- `{rname}` <{remail}> — **{rstatus}** at `{rtime_str}`"
-            + (f" · error: `{rerr}`" if rerr and rerr != "—" else "")
-        )
+QUEUE_PREVIEW_ROWS = 25  # queue rows shown until "Show all" is clicked
+WHEN_FMT = "%B %d, %Y at %I:%M %p"
+
+def relative_time(when: datetime, now: datetime) -> str:
+    """'in D day(s), H hour(s)' for future times, 'D day(s), H hour(s) ago' for past ones."""
+    seconds = int((when - now).total_seconds())
+    days, rem = divmod(abs(seconds), 86400)
+    span = f"{days} day(s), {rem // 3600} hour(s)"
+    return f"in {span}" if seconds > 0 else f"{span} ago"
 
 # ---------------- Scheduled Queue ----------------
-scheduled_emails = db.get_scheduled_emails()
-all_profiles = db.get_all_profiles()
-profile_id_map = {p.doc_id: p for p in all_profiles}
+version = db.data_version()
+recipient_labels = load_recipient_labels(db, version, missing="Unknown Profile")
 
-# Sort by local schedule time for user-friendly order
-sorted_scheduled = sorted(
-    scheduled_emails,
-    key=lambda e: dt_local(e.get("schedule_time")) or datetime.max.replace(tzinfo=get_app_tz()),
-)
+# Soonest first; sorted once per data version, not on every rerun
+sorted_scheduled = load_scheduled(db, version)
 
 st.subheader("📤 Scheduled Queue")
 if not sorted_scheduled:
     st.info("No emails are currently scheduled.")
 else:
-    st.caption(f"{len(sorted_scheduled)} email(s) in the queue.")
-    for email in sorted_scheduled:
-        email_id = email.doc_id  # ensure we have a stable id for widget keys
-        sched_local = dt_local(email.get("schedule_time"))
-        now_local = datetime.now(get_app_tz())
-        relative = ""
-        if sched_local:
-            diff = sched_local - now_local
-            if diff.total_seconds() > 0:
-                days, hours = diff.days, diff.seconds // 3600
-                relative = f"in {days} day(s), {hours} hour(s)"
-            else:
-                ago = timedelta(seconds=abs(diff.total_seconds()))
-                days, hours = ago.days, ago.seconds // 3600
-                relative = f"{days} day(s), {hours} hour(s) ago"
-
-        recipient_ids = email.get("recipients", [])
-        recipient_names = [profile_id_map.get(rid, {}).get("name", "Unknown Profile") for rid in recipient_ids]
-        counts = email.get("counts", {}) or {}
-        sent_c = counts.get("sent", 0)
-        failed_c = counts.get("failed", 0)
-        pending_c = counts.get("pending", 0)
-        total_c = counts.get("total", len(recipient_ids))
-
-        header = f"**{email.get('subject', 'No Subject')}** — {status_badge(email.get('status'))}"
-        header += f" · {sent_c} sent · {failed_c} failed · {pending_c} pending / {total_c}"
-        if sched_local:
-            header += f" · **{sched_local.strftime('%B %d, %Y at %I:%M %p')}** ({relative})"
+    st.caption(f"{len(sorted_scheduled)} email(s) in the queue. Select rows to see details or cancel them.")
+    app_tz = get_app_tz()
+    now_local = datetime.now(app_tz)
+    # Soonest QUEUE_PREVIEW_ROWS first, so first paint doesn't scale with the queue
+    show_all = st.session_state.get("show_all_sched", False)
+    preview = sorted_scheduled if show_all else sorted_scheduled[:QUEUE_PREVIEW_ROWS]
+    # One table row per campaign: the widget count stays constant however long the queue gets
+    queue_rows: list[Document] = []
+    for email in preview:
+        # The queue was ordered on schedule_time_epoch; reuse it instead of re-parsing the ISO string
+        sched_epoch = email.get("schedule_time_epoch")
+        sched_local = datetime.fromtimestamp(sched_epoch, app_tz) if sched_epoch is not None else None
+        queue_rows.append({
+            "Subject": email.get("subject", "No Subject"),
+            "Status": email.get("status", ""),
+            "Scheduled": sched_local.strftime(WHEN_FMT) if sched_local else "—",
+            "When": relative_time(sched_local, now_local) if sched_local else "",
+            # Flat count columns are materialized on every campaign write (see utils.db._flat_counts)
+            "Sent": email["sent_c"],
+            "Failed": email["failed_c"],
+            "Pending": email["pending_c"],
+            "Total": email["total_c"],
+            "Recipients": recipient_labels.get(email.doc_id, ""),
+        })
+    # The selection resets whenever the data changes, so row positions always match preview
+    event = st.dataframe(
+        queue_rows,
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="multi-row",
+        key="scheduled_queue",
+    )
+    selected = [preview[i] for i in event.selection.rows if i < len(preview)]
+    if len(preview) < len(sorted_scheduled):
+        st.button(
+            f"Show all {len(sorted_scheduled)}",
+            on_click=lambda: st.session_state.update(show_all_sched=True),
+        )
 
-        with st.expander(header):
-            st.markdown(f"**To:** {', '.join(recipient_names)}")
+    for email in selected:
+        with st.container(border=True):
+            st.markdown(f"**{email.get('subject', 'No Subject')}** — {status_badge(email.get('status'))}")
+            st.markdown(f"**To:** {recipient_labels.get(email.doc_id, '')}")
             attachments = email.get("attachments", [])
             if attachments:
-                filenames = [os.path.basename(p) for p in attachments]
+                filenames = map(attachment_name, attachments)
                 st.markdown(f"**Attachments:** {', '.join(filenames)}")
             st.text_area(
                 "Body",
                 value=email.get("body", ""),
                 height=150,
                 disabled=True,
-                key=f"scheduled_body_{email_id}",  # unique key
+                key=f"scheduled_body_{email.doc_id}",  # unique key
             )
-            if st.button("🗑️ Cancel Schedule", key=f"cancel_{email_id}", help="Permanently delete pending deliveries in this campaign"):
-                db.delete_scheduled_email(email_id)
-                st.rerun()
+    # Selected campaigns are cancelled together (one DB write, not one per row)
+    if selected and st.button(
+        f"🗑️ Cancel {len(selected)} selected schedule(s)",
+        help="Permanently delete pending deliveries in these campaigns",
+    ):
+        db.delete_scheduled_emails([e.doc_id for e in selected])
+        st.rerun()
 
 st.divider()
 
 # ---------------- Recently Completed ----------------
 st.subheader("✅ Recently Completed Jobs")
-completed = [
-    e for e in db.emails_table.all()
-    if e.get("status") in ("sent", "partial", "failed")
-]
-# Sort by local sent time for consistency with TZ
-completed_sorted = sorted(
-    completed,
-    key=lambda e: dt_local(e.get("sent_time")) or datetime.min.replace(tzinfo=get_app_tz()),
-    reverse=True,
-)[:10]
+# Newest 10 completed jobs from the DB's sorted sent-time index, cached until
+# the data version changes. Delivery logs are fetched only for jobs whose toggle
+# is on (toggle values are in session_state before the widgets render), in one
+# batched pass; collapsed expander bodies run on every rerun, so they can't defer it.
+completed_sorted = load_recent_completed(db, version, 10)
+open_log_ids = tuple(e.doc_id for e in completed_sorted if st.session_state.get(f"log_open_{e.doc_id}"))
+deliveries_by_campaign = load_deliveries(db, open_log_ids, version) if open_log_ids else {}
 
 if not completed_sorted:
     st.info("No completed jobs found yet.")
 else:
+    app_tz = get_app_tz()
     for email in completed_sorted:
         email_id = email.doc_id  # define the id here too
-        sent_local = dt_local(email.get("sent_time"))
-        when = sent_local.strftime("%B %d, %Y at %I:%M %p") if sent_local else "—"
+        # Completed rows carry sent_time_epoch (their sort key); skip re-parsing the ISO string
+        sent_epoch = email.get("sent_time_epoch")
+        sent_local = datetime.fromtimestamp(sent_epoch, app_tz) if sent_epoch is not None else None
+        when = sent_local.strftime(WHEN_FMT) if sent_local else "—"
 
-        recipient_ids = email.get("recipients", [])
-        recipient_names = [profile_id_map.get(rid, {}).get("name", "Unknown Profile") for rid in recipient_ids]
-        counts = email.get("counts", {}) or {}
-        sent_c = counts.get("sent", 0)
-        failed_c = counts.get("failed", 0)
-        total_c = counts.get("total", len(recipient_ids))
+        sent_c, failed_c, total_c = email["sent_c"], email["failed_c"], email["total_c"]
 
         header = f"**{email.get('subject', 'No Subject')}** — {status_badge(email.get('status'))} · {when}"
         header += f" · {sent_c} sent · {failed_c} failed / {total_c}"
 
         with st.expander(header):
-            st.markdown(f"**To:** {', '.join(recipient_names)}")
+            st.markdown(f"**To:** {recipient_labels.get(email_id, '')}")
             st.text_area(
                 "Body",
                 value=email.get("body", ""),
@@ -166,5 +148,5 @@ else:
                 disabled=True,
                 key=f"completed_body_{email_id}",  # unique key
             )
-            with st.expander("Delivery Log"):
-                display_delivery_log(email)
+            if st.toggle("Show delivery log", key=f"log_open_{email_id}"):
+                display_delivery_log(deliveries_by_campaign.get(email_id, []), f"log_open_{email_id}")
@@ -1,18 +1,13 @@
 import streamlit as st
 
+from utils.cache import get_db, load_user_profile
 from utils.time import set_runtime_tz
 from utils.ui import render_settings_sidebar
 
 # Page config must be first
 st.set_page_config(page_title="My Profile", page_icon="👤", layout="wide")
 
-# Ensure the db_handler is initialized from the Home page
-if "db_handler" not in st.session_state:
-    st.error("Database handler not initialized. Please go to the Home page first.")
-    st.stop()
-
-# Access the handler from session state
-db = st.session_state.db_handler
+db = get_db()
 
 # Apply saved timezone + show settings sidebar
 tz_saved = db.get_timezone()
@@ -25,7 +20,7 @@ st.write("Set up your personal information. This will be used to populate your s
 st.divider()
 
 # --- Load existing profile data ---
-user_profile = db.get_user_profile() or {}
+user_profile = load_user_profile(db, db.data_version()) or {}
 
 # --- Profile Form ---
 with st.form("my_profile_form"):
@@ -1,15 +1,56 @@
 import os
-import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 
 from loguru import logger
 
-from utils.db import DatabaseHandler
-from utils.helpers import render_email_body, send_email
-
-POLL_SECONDS = int(os.getenv("WORKER_POLL_SECONDS", "20"))
+from utils.db import DatabaseHandler, DeliveryResult
+from utils.helpers import SmtpSession, fill_template, send_email, sender_placeholders, specialize_template
+from utils.notify import notify_data_changed, wait_for_wake
+from utils.time import now_utc_iso
+
+POLL_SECONDS = int(os.getenv("WORKER_POLL_SECONDS", "20"))  # upper bound on any one sleep
+WORKER_CONCURRENCY = max(1, int(os.getenv("WORKER_CONCURRENCY", "8")))  # parallel SMTP sends
+WORKER_BATCH_LIMIT = max(1, int(os.getenv("WORKER_BATCH_LIMIT", "500")))  # deliveries taken per tick
+WORKER_STATUS_FLUSH = max(1, int(os.getenv("WORKER_STATUS_FLUSH", "10")))  # send results per DB write
+
+# campaign_id -> (campaign row, its specialize_template() body segments), built once per tick
+Campaigns = dict[int, tuple[dict, tuple[str, ...]]]
+
+
+def _load_campaigns(db: DatabaseHandler, deliveries: list) -> Campaigns:
+    """Fetch each campaign referenced by `deliveries` once, with its body pre-filled for the sender."""
+    out: Campaigns = {}
+    for cid in {d.get("campaign_id") for d in deliveries if d.get("campaign_id")}:
+        campaign = db.get_campaign(cid)
+        if campaign:
+            segments = specialize_template(
+                campaign.get("body", ""),
+                sender_placeholders(campaign.get("sender_profile")),
+                include_signature=bool(campaign.get("add_signature", True)),
+            )
+            out[cid] = (campaign, segments)
+    return out
+
+
+def _fill_missing_snapshots(db: DatabaseHandler, deliveries: list) -> None:
+    """Fill in recipient snapshots missing from older delivery rows.
+
+    Uses the recipient's current profile. The needed profiles are fetched
+    together, once per tick, and only if some delivery needs them.
+    """
+    missing = [d for d in deliveries if not d.get("recipient_snapshot") and d.get("recipient_id") is not None]
+    if not missing:
+        return
+    profiles = {p.doc_id: p for p in db.get_profiles_by_ids(list({d["recipient_id"] for d in missing}))}
+    for d in missing:
+        profile = profiles.get(d["recipient_id"])
+        if profile:
+            d["recipient_snapshot"] = dict(profile)
+            d["recipient_email"] = d.get("recipient_email") or profile.get("email")
 
 
-def _send_one_delivery(db: DatabaseHandler, delivery_doc) -> None:
+def _send_one_delivery(delivery_doc, campaigns: Campaigns, session: SmtpSession | None = None) -> DeliveryResult:
     delivery_id = delivery_doc.doc_id
     campaign_id = delivery_doc.get("campaign_id")
     recipient_email = delivery_doc.get("recipient_email")
@@ -17,34 +58,23 @@ def _send_one_delivery(db: DatabaseHandler, delivery_doc) -> None:
 
     if not campaign_id:
         logger.error(f"[delivery {delivery_id}] Missing campaign_id.")
-        db.update_delivery_status(delivery_id, "failed", "missing_campaign")
-        return
+        return DeliveryResult(delivery_id, "failed", "missing_campaign")
 
-    campaign = db.get_campaign(campaign_id)
+    campaign, body_segments = campaigns.get(campaign_id) or (None, None)
     if not campaign:
         logger.error(f"[delivery {delivery_id}] Campaign {campaign_id} not found.")
-        db.update_delivery_status(delivery_id, "failed", "campaign_not_found")
-        return
+        return DeliveryResult(delivery_id, "failed", "campaign_not_found")
 
     subject = campaign.get("subject", "")
-    body_template = campaign.get("body", "")
     attachments = campaign.get("attachments", []) or []
-    add_signature = bool(campaign.get("add_signature", True))
-    sender_profile = campaign.get("sender_profile", {}) or {}
     body_is_html = bool(campaign.get("body_is_html", False))
 
     if not recipient_email:
         logger.warning(f"[delivery {delivery_id}] No recipient email in snapshot.")
-        db.update_delivery_status(delivery_id, "failed", "missing_email")
-        return
+        return DeliveryResult(delivery_id, "failed", "missing_email")
 
-    # Personalized body
-    rendered_body = render_email_body(
-        body_template=body_template,
-        recipient_profile=recipient_snapshot,
-        sender_profile=sender_profile,
-        include_signature=add_signature,
-    )
+    # Personalized body: only the recipient's placeholders are left to fill
+    rendered_body = fill_template(body_segments, recipient_snapshot)
 
     ok, err = send_email(
         to=recipient_email,
@@ -52,15 +82,52 @@ def _send_one_delivery(db: DatabaseHandler, delivery_doc) -> None:
         contents=rendered_body,
         attachments=attachments,
         is_html=body_is_html,
+        session=session,
     )
 
     if ok:
         logger.success(f"[delivery {delivery_id}] Sent to {recipient_email}.")
-        db.update_delivery_status(delivery_id, "sent", None, rendered_body=rendered_body)
+        return DeliveryResult(delivery_id, "sent", None, now_utc_iso())
 
-    else:
-        logger.error(f"[delivery {delivery_id}] Failed to send to {recipient_email}: {err}")
-        db.update_delivery_status(delivery_id, "failed", err or "send_error")
+    logger.error(f"[delivery {delivery_id}] Failed to send to {recipient_email}: {err}")
+    return DeliveryResult(delivery_id, "failed", err or "send_error", now_utc_iso())
+
+
+def _safe_send(delivery, campaigns: Campaigns, session: SmtpSession | None = None) -> DeliveryResult:
+    """_send_one_delivery that never raises: unexpected errors mark the delivery failed."""
+    try:
+        return _send_one_delivery(delivery, campaigns, session)
+    except Exception as e:
+        from traceback import format_exc
+        logger.error(f"[delivery {getattr(delivery, 'doc_id', '?')}] Unexpected error: {e}\n{format_exc()}")
+        return DeliveryResult(delivery.doc_id, "failed", "unexpected_error")
+
+
+def _record(db: DatabaseHandler, results: list[DeliveryResult]) -> None:
+    """Write a group of send outcomes in one DB update and tell the UI."""
+    try:
+        db.update_delivery_statuses(results)
+    except Exception:
+        logger.exception(f"Failed to record {len(results)} delivery result(s).")
+    notify_data_changed()  # let the UI refresh without polling the file
+
+
+def _send_batch(db: DatabaseHandler, deliveries: list, campaigns: Campaigns) -> None:
+    """Send a slice of due deliveries over one SMTP connection.
+
+    Outcomes are recorded every WORKER_STATUS_FLUSH sends (one db.json write and
+    one aggregate recompute per campaign each time, rather than per email), so a
+    crash mid-batch loses at most that many results.
+    """
+    results: list[DeliveryResult] = []
+    with SmtpSession() as session:
+        for delivery in deliveries:
+            results.append(_safe_send(delivery, campaigns, session))
+            if len(results) >= WORKER_STATUS_FLUSH:
+                _record(db, results)
+                results = []
+    if results:
+        _record(db, results)
 
 
 def main() -> None:
@@ -69,26 +136,40 @@ def main() -> None:
     logger.info("📮 Email worker started. Polling for due deliveries...")
 
     db = DatabaseHandler(db_file="db.json")
+    # SMTP sends are network-bound and independent per recipient, so a small
+    # pool overlaps them; DB writes stay serialized inside DatabaseHandler.
+    pool = ThreadPoolExecutor(max_workers=WORKER_CONCURRENCY, thread_name_prefix="send")
 
     try:
         while True:
-            db.reload()
-            due_deliveries = db.get_due_deliveries()
+            # No reload needed: every DatabaseHandler call checks the file stamp
+            # and reopens TinyDB only if the UI wrote since our last access.
+            # Bounded, so a large backlog goes out over several ticks that each record progress
+            due_deliveries = db.get_due_deliveries(limit=WORKER_BATCH_LIMIT)
             if due_deliveries:
                 logger.info(f"Found {len(due_deliveries)} due delivery(ies). Processing...")
-                for delivery in due_deliveries:
-                    try:
-                        _send_one_delivery(db, delivery)
-                    except Exception as e:
-                        from traceback import format_exc
-                        logger.error(f"[delivery {getattr(delivery, 'doc_id', '?')}] Unexpected error: {e}\n{format_exc()}")
-                        try:
-                            db.update_delivery_status(delivery.doc_id, "failed", "unexpected_error")
-                        except Exception:
-                            logger.exception("Also failed to mark delivery as failed.")
-            time.sleep(POLL_SECONDS)
+                # Fetch each campaign once per tick; its deliveries share the row
+                campaigns = _load_campaigns(db, due_deliveries)
+                _fill_missing_snapshots(db, due_deliveries)
+                # One connection per pool thread: deal the batch out round-robin
+                n = min(WORKER_CONCURRENCY, len(due_deliveries))
+                batches = [due_deliveries[i::n] for i in range(n)]
+                # Wait for the whole batch so the next poll can't pick these up again
+                list(pool.map(lambda b: _send_batch(db, b, campaigns), batches))
+                if len(due_deliveries) == WORKER_BATCH_LIMIT:
+                    continue  # a full batch: more may already be due
+            # Sleep until the next delivery is due (capped by POLL_SECONDS), or
+            # until the UI schedules something new and wakes us.
+            sleep_s = float(POLL_SECONDS)
+            next_due = db.get_next_due_time()
+            if next_due is not None:
+                until_due = (next_due - datetime.now(timezone.utc)).total_seconds()
+                sleep_s = max(1.0, min(sleep_s, until_due))
+            wait_for_wake(sleep_s)
     except KeyboardInterrupt:
         logger.info("Shutdown signal received. Exiting worker.")
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
 
 
 if __name__ == "__main__":
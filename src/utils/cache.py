@@ -0,0 +1,154 @@
+"""Streamlit read caches for the database.
+
+Every widget interaction reruns the page script from the top. These loaders let
+reruns reuse already-parsed rows instead of re-reading `db.json`; they are keyed
+on `DatabaseHandler.data_version()`, so any write (from the UI or the worker)
+invalidates them.
+`get_db` hands every session and page the same process-wide DatabaseHandler.
+"""
+import atexit
+from typing import Any
+
+import numpy as np
+import streamlit as st
+
+from utils.db import DatabaseHandler, DataVersion
+from utils.helpers import render_email_body
+
+Document = dict[str, Any]
+
+# uint8 codes for the campaign status column of the dashboard arrays (0 = other)
+STATUS_CODES: dict[str, int] = {"sent": 1, "partial": 2, "failed": 3, "scheduled": 4}
+
+
+@st.cache_resource(show_spinner=False)
+def get_db() -> DatabaseHandler:
+    """The process-wide DatabaseHandler, shared by all sessions and pages."""
+    db = DatabaseHandler(db_file="db.json")
+    atexit.register(db.close_db)
+    return db
+
+
+@st.cache_data(show_spinner=False)
+def load_emails(_db: DatabaseHandler, version: DataVersion) -> list[Document]:
+    """All campaign rows (the `emails` table)."""
+    return _db.get_all_emails()
+
+
+@st.cache_data(show_spinner=False)
+def load_profiles(_db: DatabaseHandler, version: DataVersion) -> list[Document]:
+    """All contact profiles."""
+    return _db.get_all_profiles()
+
+
+@st.cache_data(show_spinner=False)
+def load_profile_names(_db: DatabaseHandler, version: DataVersion) -> dict[int, str]:
+    """Profile doc_id -> name, for showing campaign recipients."""
+    return {p.doc_id: p.get("name", "Unknown") for p in load_profiles(_db, version)}
+
+
+@st.cache_data(show_spinner=False)
+def load_recipient_labels(_db: DatabaseHandler, version: DataVersion, missing: str = "Unknown") -> dict[int, str]:
+    """Campaign doc_id -> its recipients' names joined for display ("Ann, Bob").
+
+    Built in one pass per data version, so list pages do a single lookup per row
+    instead of resolving and joining every recipient on each rerun. `missing`
+    stands in for recipients whose profile was deleted.
+    """
+    name_by_id = load_profile_names(_db, version)
+    return {
+        e.doc_id: ", ".join(name_by_id.get(rid, missing) for rid in e.get("recipients", []))
+        for e in load_emails(_db, version)
+    }
+
+
+@st.cache_data(show_spinner=False)
+def load_recipient_options(_db: DatabaseHandler, version: DataVersion) -> dict[str, tuple[str, Document]]:
+    """Compose recipient picker: "Name (email)" option label -> (tab label, profile)."""
+    return {f"{p['name']} ({p['email']})": (p["name"].strip(), p) for p in load_profiles(_db, version)}
+
+
+@st.cache_data(show_spinner=False)
+def load_scheduled(_db: DatabaseHandler, version: DataVersion) -> list[Document]:
+    """Scheduled campaigns, soonest first (ordered by the DB on schedule_time_epoch)."""
+    return _db.get_scheduled_emails()
+
+
+@st.cache_data(show_spinner=False)
+def load_recent_completed(_db: DatabaseHandler, version: DataVersion, limit: int) -> list[Document]:
+    """The `limit` most recently completed (sent/partial/failed) campaigns, newest first."""
+    return _db.get_recent_by_status(("sent", "partial", "failed"), limit=limit)
+
+
+@st.cache_data(show_spinner=False)
+def load_reminder_lists(_db: DatabaseHandler, version: DataVersion) -> tuple[list[Document], list[Document]]:
+    """(campaigns with a reminder, soonest first; sent/partial campaigns without one) for the Reminders page."""
+    return _db.get_emails_with_reminder(), _db.get_sendable_without_reminder()
+
+
+@st.cache_data(show_spinner=False)
+def load_templates(_db: DatabaseHandler, version: DataVersion) -> list[Document]:
+    """All saved email templates."""
+    return _db.get_all_templates()
+
+
+@st.cache_data(show_spinner=False)
+def load_template_map(_db: DatabaseHandler, version: DataVersion) -> dict[str, Document]:
+    """Template name -> template."""
+    return {t["name"]: t for t in load_templates(_db, version)}
+
+
+@st.cache_data(show_spinner=False)
+def load_user_profile(_db: DatabaseHandler, version: DataVersion) -> Document | None:
+    """The sender's own profile (name, signature, ...), if set."""
+    return _db.get_user_profile()
+
+
+@st.cache_data(show_spinner=False)
+def load_deliveries(_db: DatabaseHandler, campaign_ids: tuple[int, ...], version: DataVersion) -> dict[int, list[Document]]:
+    """Per-recipient delivery rows of the given campaigns, fetched in one table pass."""
+    return _db.get_deliveries_for_campaigns(campaign_ids)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def search_sent_emails(_db: DatabaseHandler, query: str, version: DataVersion) -> list[Document]:
+    """Keyword search over sent campaigns; reruns with an unchanged query skip the DB."""
+    return _db.search_emails(query)
+
+
+@st.cache_data(show_spinner=False)
+def load_email_arrays(_db: DatabaseHandler, version: DataVersion) -> dict[str, np.ndarray]:
+    """Column-oriented view of the `emails` table for vectorized dashboard aggregates.
+
+    Returns arrays aligned position-by-position with `load_emails(_db, version)`:
+    `status` (uint8, see STATUS_CODES), `sent_epoch` (int64 UTC seconds, 0 when
+    not completed) and `reminder_epoch` (int64 reminder_date_epoch, 0 when unset).
+    """
+    emails = load_emails(_db, version)
+    n = len(emails)
+    return {
+        "status": np.fromiter((STATUS_CODES.get(e.get("status"), 0) for e in emails), dtype=np.uint8, count=n),
+        "sent_epoch": np.fromiter((e.get("sent_time_epoch") or 0 for e in emails), dtype=np.int64, count=n),
+        "reminder_epoch": np.fromiter((e.get("reminder_date_epoch") or 0 for e in emails), dtype=np.int64, count=n),
+    }
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def render_preview(
+    body_template: str,
+    recipient_profile: Document,
+    sender_fields: Document,
+    include_signature: bool,
+) -> str:
+    """Memoized render_email_body for the Compose preview tabs.
+
+    `sender_fields` is `sender_placeholders(my_profile)`, built once per rerun by
+    the caller. The body text and both mappings are part of the key, so a rerun
+    only re-renders the tabs whose inputs actually changed.
+    """
+    return render_email_body(
+        body_template=body_template,
+        recipient_profile=recipient_profile,
+        include_signature=include_signature,
+        sender_fields=sender_fields,
+    )
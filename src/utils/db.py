@@ -1,15 +1,197 @@
-import re
-from contextlib import suppress  # NEW
+import bisect
+import heapq
+import os
+import sys
+import threading
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager, suppress
+from itertools import islice
 from datetime import date, datetime
-from typing import Any
+from typing import Any, NamedTuple
 
+import orjson
 from filelock import FileLock
-from tinydb import Query, TinyDB, where
+from tinydb import TinyDB, where
+from tinydb.storages import JSONStorage
+from tinydb.table import Document as TinyDocument, Table
 
-from utils.time import now_utc_iso, to_utc_iso  # UTC helpers
+from utils.notify import wake_worker
+from utils.time import date_to_epoch, iso_to_epoch, now_utc_iso, parse_iso_to_utc, to_utc_iso  # UTC helpers
 
 Document = dict[str, Any]
 
+USER_PROFILE_ID = 1  # the user_profile table holds a single row at this doc_id
+
+
+class DeliveryResult(NamedTuple):
+    """Outcome of one send attempt, for DatabaseHandler.update_delivery_statuses."""
+
+    delivery_id: int
+    status: str  # "sent" | "failed"
+    error: str | None = None
+    attempted_at: str | None = None  # UTC ISO; defaults to the time of the update
+
+
+# (write generation, mtime_ns, size) of db.json; see WriteGeneration
+DataVersion = tuple[int, int, int]
+
+
+class WriteGeneration:
+    """Write counter kept in a sidecar file next to the database (`<db>.gen`).
+
+    Bumped after every write to the database file, always under the
+    cross-process file lock. The file's (mtime_ns, size) alone can miss a
+    same-size rewrite by the other process within one coarse mtime tick; the
+    counter can't, so stamps include it.
+    """
+
+    def __init__(self, db_path: str) -> None:
+        self._fd = os.open(f"{db_path}.gen", os.O_RDWR | os.O_CREAT, 0o644)
+
+    def read(self) -> int:
+        raw = os.pread(self._fd, 8, 0)
+        return int.from_bytes(raw, "little") if len(raw) == 8 else 0
+
+    def bump(self) -> None:
+        os.pwrite(self._fd, (self.read() + 1).to_bytes(8, "little"), 0)
+
+    def close(self) -> None:
+        with suppress(OSError):
+            os.close(self._fd)
+
+
+class OrjsonStorage(JSONStorage):
+    """TinyDB's JSONStorage with orjson doing the (de)serialization, plus a
+    read cache.
+
+    TinyDB re-reads the whole file on every query. This keeps the last parsed
+    document and serves it again while the file's stamp (write generation,
+    mtime_ns, size) is unchanged, so only a write by another process costs a
+    re-parse. Writes still go
+    straight to disk (write-through): a write-back cache like TinyDB's
+    CachingMiddleware would let the UI and the worker overwrite each other's
+    changes. The file is opened in binary mode and stays plain UTF-8 JSON,
+    readable by the stock storage.
+    """
+
+    def __init__(self, path: str, **kwargs: Any) -> None:
+        super().__init__(path, access_mode="rb+", **kwargs)
+        self._generation = WriteGeneration(path)
+        self._cache: dict[str, dict[str, Any]] | None = None
+        self._cache_stamp: DataVersion | None = None
+        self._held = 0  # hold_writes() nesting depth
+        self._dirty = False
+
+    def _stamp(self) -> DataVersion:
+        st = os.fstat(self._handle.fileno())
+        return self._generation.read(), st.st_mtime_ns, st.st_size
+
+    def close(self) -> None:
+        super().close()
+        self._generation.close()
+
+    def discard_cache(self) -> None:
+        """Forget the parsed document; the next read re-parses the file."""
+        self._cache = self._cache_stamp = None
+        self._dirty = False  # held writes in the dropped document are lost too
+
+    def hold_writes(self) -> None:
+        """Apply writes to the cached document only, until the matching release_writes().
+
+        Calls nest. Only safe while the caller holds the cross-process file lock throughout.
+        """
+        self._held += 1
+
+    def release_writes(self) -> None:
+        """End one hold_writes(); the outermost saves the document once if anything was held."""
+        self._held = max(0, self._held - 1)
+        if not self._held and self._dirty:
+            self._dirty = False
+            self.write(self._cache)
+
+    def drop_writes(self) -> None:
+        """End one hold_writes() without saving: everything held so far, including
+        an enclosing hold's writes (they share the cached document), is dropped.
+        """
+        self._held = max(0, self._held - 1)
+        self.discard_cache()
+
+    def read(self) -> dict[str, dict[str, Any]] | None:
+        stamp = self._stamp()
+        if self._cache is not None and stamp == self._cache_stamp:
+            return self._cache
+        self._handle.seek(0)
+        raw = self._handle.read()
+        self._cache = orjson.loads(raw) if raw else None
+        self._cache_stamp = stamp
+        return self._cache
+
+    def write(self, data: dict[str, dict[str, Any]]) -> None:
+        if self._held:
+            # The file is untouched, so its stamp still matches and reads see `data`
+            self._cache, self._dirty = data, True
+            return
+        self._handle.seek(0)
+        self._handle.write(orjson.dumps(data))
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self._handle.truncate()
+        self._generation.bump()
+        self._cache, self._cache_stamp = data, self._stamp()
+
+
+def _rows_by_id(table: Table, doc_ids: Iterable[int]) -> list[Document]:
+    """Rows for `doc_ids`, in that order (unknown ids skipped).
+
+    Looks each id up in the table's dict. TinyDB's get(doc_ids=...) instead
+    walks every row of the table, which would make index-driven reads cost
+    O(table size) however few rows they need.
+
+    Relies on TinyDB's private Table._read_table() (tinydb 4.x, pinned in
+    requirements.txt) for that dict. It hands out the storage's cached
+    document, so each row is copied, nested lists/dicts included: a caller
+    editing a returned row must not change what later reads see.
+    """
+    raw = table._read_table()
+    rows: list[Document] = []
+    for doc_id in doc_ids:
+        doc = raw.get(str(doc_id))
+        if doc is not None:
+            rows.append(table.document_class(_copy_json(doc), doc_id))
+    return rows
+
+
+def _copy_json(value: Any) -> Any:
+    """Deep copy of a JSON value (dicts, lists and immutable scalars only)."""
+    if type(value) is dict:
+        return {k: _copy_json(v) for k, v in value.items()}
+    if type(value) is list:
+        return [_copy_json(v) for v in value]
+    return value
+
+
+def _intern(value: Any) -> Any:
+    """sys.intern for strings; anything else (None, numbers) is returned as is."""
+    return sys.intern(value) if type(value) is str else value
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _flat_counts(counts: dict[str, int]) -> dict[str, int]:
+    """Top-level copies of a campaign's counts, so list views read one key per number.
+
+    They are written in the same update as `counts` (and backfilled on open),
+    so every campaign row has them. `counts` stays the authoritative record
+    that the delivery bookkeeping updates; pages read only the flat columns.
+    """
+    return {
+        "total_c": counts["total"], "pending_c": counts["pending"],
+        "sent_c": counts["sent"], "failed_c": counts["failed"],
+    }
+
 
 class DatabaseHandler:
     """Database operations with TinyDB for the Email App.
@@ -18,16 +200,46 @@ class DatabaseHandler:
       - emails       (campaigns): one row per composed job (subject/body/attachments/sender); groups many deliveries
       - deliveries   (per recipient): one row per recipient; the worker sends these one by one
       - profiles, templates, user_profile, settings: as before
+
+    Campaign status lookups are served from an in-memory index: status -> doc_ids,
+    plus, per status, a list of (sent_time_epoch, doc_id) kept sorted for
+    "most recent" range queries, and the set of campaigns with a reminder. It
+    is maintained on our own writes and dropped whenever another process (e.g.
+    the worker) rewrites the file. Keyword search over sent campaigns uses a
+    trigram index. Deliveries are indexed by campaign (campaign_id -> ids, plus
+    each delivery's status) and pending ones kept in a due queue sorted on
+    schedule_time. Both are rebuilt lazily the same way.
     """
 
     def __init__(self, db_file: str = "db.json"):
         self.db_path = db_file
         self._lock = FileLock(f"{db_file}.lock")
+        # Threads sharing this handler (Streamlit sessions, worker pool) also
+        # share its TinyDB object and indexes, so serialize them in-process too
+        self._thread_lock = threading.RLock()
+        self._txn_now: str | None = None  # set while a transaction() is open
+        self._generation = WriteGeneration(db_file)
+        self._seen_stamp: DataVersion | None = None
+        self._status_index: dict[str, set[int]] | None = None
+        self._sent_order: dict[str, list[tuple[int, int]]] = {}
+        self._sent_epoch_of: dict[int, int] = {}
+        self._reminder_ids: set[int] = set()  # campaigns with a reminder_date; built with the status index
+        self._search_index: dict[str, set[int]] | None = None  # trigram -> sent campaign ids
+        self._search_text: dict[int, str] = {}  # sent campaign id -> lowercased subject/body
+        self._profile_emails: set[str] | None = None  # unique-email check for add_profile
+        self._template_names: set[str] | None = None  # unique-name check for add_template
+        self._settings: dict[str, Any] | None = None  # key -> value, read on every page render
+        self._deliveries_of: dict[int, set[int]] | None = None  # campaign id -> delivery ids
+        self._delivery_status: dict[int, str] = {}  # delivery id -> status; built with _deliveries_of
+        self._status_counts: dict[int, Counter] = {}  # campaign id -> deliveries per status, kept current
+        self._due_queue: list[tuple[str, int]] = []  # sorted (schedule_time, delivery id) of pending deliveries
+        self._due_time_of: dict[int, str] = {}  # pending delivery id -> its key's schedule_time
         self._open_db()
+        self._backfill_campaign_fields()
 
     # ----- internals -----
     def _open_db(self) -> None:
-        self.db = TinyDB(self.db_path)
+        self.db = TinyDB(self.db_path, storage=OrjsonStorage)
         self.profiles_table = self.db.table("profiles")
         self.templates_table = self.db.table("templates")
         self.user_profile_table = self.db.table("user_profile")
@@ -36,24 +248,252 @@ class DatabaseHandler:
         self.settings_table = self.db.table("settings")
 
     def reload(self) -> None:
-        with self._lock:
+        with self._thread_lock, self._lock:
             with suppress(Exception):
                 self.db.close()
             self._open_db()
+            self._drop_indexes()
+
+    def _drop_indexes(self) -> None:
+        self._status_index = None
+        self._search_index = None
+        self._profile_emails = None
+        self._template_names = None
+        self._settings = None
+        self._deliveries_of = None
+
+    def _file_stamp(self) -> DataVersion:
+        try:
+            st = os.stat(self.db_path)
+            return self._generation.read(), st.st_mtime_ns, st.st_size
+        except OSError:
+            return self._generation.read(), 0, 0
+
+    def data_version(self) -> DataVersion:
+        """Cheap token that changes whenever db.json is rewritten, by any process.
+
+        It is the file's stamp (write generation, mtime_ns, size): a stat and an
+        8-byte read, no lock and no parse. UI caches use it as their invalidation key.
+        """
+        return self._file_stamp()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the file lock; if another process wrote since our last access,
+        reopen TinyDB (its query cache and next-id counters would be stale) and
+        drop the in-memory indexes so they are rebuilt on demand.
+        """
+        with self._thread_lock, self._lock:
+            stamp = self._file_stamp()
+            if stamp != self._seen_stamp:
+                with suppress(Exception):
+                    self.db.close()
+                self._open_db()
+                self._drop_indexes()
+                # Record it now, not only on exit: a nested _locked() (any handler
+                # method inside a transaction) must not reopen again and drop the
+                # outer block's held writes
+                self._seen_stamp = stamp
+            failed = False
+            try:
+                yield
+            except BaseException:
+                # TinyDB edits the cached document in place before writing it;
+                # if a write failed midway the cache may no longer match the file
+                failed = True
+                self.db.storage.discard_cache()
+                raise
+            finally:
+                # Anything written inside a clean block is ours and already
+                # indexed. After a failure the indexes and TinyDB's query cache
+                # may hold rows that never reached the file: force a reopen
+                self._seen_stamp = None if failed else self._file_stamp()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Hold the lock across several writes and save db.json once at the end,
+        instead of rewriting the whole file for each of them.
+
+        Nests: DatabaseHandler methods that use it internally join an outer
+        transaction, and the file is written when the outermost one exits.
+        Keep the block short; the other process waits for the lock meanwhile.
+        Everything done in it is stamped with one "now" (see _now_iso).
+        If the block raises, nothing it (or an enclosing transaction) held is
+        written: db.json is left as it was before the outermost one began.
+        """
+        with self._locked():
+            outermost = self._txn_now is None
+            if outermost:
+                self._txn_now = now_utc_iso()
+            storage = self.db.storage
+            storage.hold_writes()
+            try:
+                yield
+            except BaseException:
+                # Save nothing of a block that raised; _locked() then reopens
+                # and rebuilds the indexes from the untouched file
+                storage.drop_writes()
+                raise
+            else:
+                storage.release_writes()
+            finally:
+                if outermost:
+                    self._txn_now = None
+
+    def _now_iso(self) -> str:
+        """The current transaction's timestamp, or the actual time outside one."""
+        return self._txn_now or now_utc_iso()
+
+    def _backfill_campaign_fields(self) -> None:
+        """One-time upgrade of campaign rows written before the flat count columns,
+        sent_time_epoch, reminder_date_epoch and schedule_time_epoch existed. A
+        no-op (no write) once every row has them.
+        """
+        with self._locked():
+            for row in self.emails_table.all():
+                patch: dict[str, Any] = {}
+                if "total_c" not in row:
+                    n = len(row.get("recipients") or [])
+                    counts = row.get("counts") or {}
+                    patch.update(_flat_counts({
+                        "total": counts.get("total", n), "pending": counts.get("pending", 0),
+                        "sent": counts.get("sent", 0), "failed": counts.get("failed", 0),
+                    }))
+                if row.get("sent_time") and row.get("sent_time_epoch") is None:
+                    patch["sent_time_epoch"] = iso_to_epoch(row["sent_time"])
+                if row.get("schedule_time") and row.get("schedule_time_epoch") is None:
+                    patch["schedule_time_epoch"] = iso_to_epoch(row["schedule_time"])
+                if row.get("reminder_date") and row.get("reminder_date_epoch") is None:
+                    patch["reminder_date_epoch"] = date_to_epoch(date.fromisoformat(row["reminder_date"]))
+                if patch:
+                    self.emails_table.update(patch, doc_ids=[row.doc_id])
+
+    # ----- campaign status index -----
+    def _ensure_status_index(self) -> dict[str, set[int]]:
+        if self._status_index is None:
+            index: dict[str, set[int]] = {}
+            order: dict[str, list[tuple[int, int]]] = {}
+            epoch_of: dict[int, int] = {}
+            reminders: set[int] = set()
+            for row in self.emails_table.all():
+                status = row.get("status")
+                index.setdefault(status, set()).add(row.doc_id)
+                if row.get("reminder_date"):
+                    reminders.add(row.doc_id)
+                epoch = row.get("sent_time_epoch")
+                if epoch is not None:
+                    order.setdefault(status, []).append((epoch, row.doc_id))
+                    epoch_of[row.doc_id] = epoch
+            for entries in order.values():
+                entries.sort()
+            self._status_index, self._sent_order, self._sent_epoch_of = index, order, epoch_of
+            self._reminder_ids = reminders
+        return self._status_index
+
+    def _index_email(self, doc_id: int, status: str | None, sent_epoch: int | None = None) -> None:
+        if self._status_index is None:
+            return  # built lazily from the table on next use
+        for old_status, ids in self._status_index.items():
+            if doc_id in ids:
+                ids.discard(doc_id)
+                old_epoch = self._sent_epoch_of.pop(doc_id, None)
+                if old_epoch is not None:
+                    self._sent_order[old_status].remove((old_epoch, doc_id))
+        if status is None:
+            self._reminder_ids.discard(doc_id)
+        if self._search_index is not None and (status == "sent" or doc_id in self._search_text):
+            self._search_index = None  # membership of the searchable set changed
+        if status is not None:
+            self._status_index.setdefault(status, set()).add(doc_id)
+            if sent_epoch is not None:
+                bisect.insort(self._sent_order.setdefault(status, []), (sent_epoch, doc_id))
+                self._sent_epoch_of[doc_id] = sent_epoch
+
+    def _ensure_search_index(self) -> dict[str, set[int]]:
+        if self._search_index is None:
+            ids = self._ensure_status_index().get("sent")
+            rows = _rows_by_id(self.emails_table, ids or ())
+            index: dict[str, set[int]] = {}
+            texts: dict[int, str] = {}
+            for row in rows:
+                # \x1f keeps a match from spanning the subject/body boundary
+                text = f"{row.get('subject') or ''}\x1f{row.get('body') or ''}".casefold()
+                texts[row.doc_id] = text
+                for gram in _trigrams(text):
+                    index.setdefault(gram, set()).add(row.doc_id)
+            self._search_index, self._search_text = index, texts
+        return self._search_index
+
+    # ----- delivery index (by campaign, status, due time) -----
+    def _ensure_delivery_index(self) -> dict[int, set[int]]:
+        if self._deliveries_of is None:
+            deliveries_of: dict[int, set[int]] = {}
+            status_of: dict[int, str] = {}
+            counts: dict[int, Counter] = {}
+            time_of: dict[int, str] = {}
+            for d in self.deliveries_table:
+                cid = d.get("campaign_id")
+                deliveries_of.setdefault(cid, set()).add(d.doc_id)
+                status_of[d.doc_id] = d.get("status")
+                counts.setdefault(cid, Counter())[d.get("status")] += 1
+                if d.get("status") == "pending" and d.get("schedule_time"):
+                    time_of[d.doc_id] = d["schedule_time"]
+            self._deliveries_of, self._delivery_status = deliveries_of, status_of
+            self._status_counts = counts
+            self._due_queue = sorted((t, i) for i, t in time_of.items())
+            self._due_time_of = time_of
+        return self._deliveries_of
+
+    def _ensure_due_queue(self) -> list[tuple[str, int]]:
+        self._ensure_delivery_index()
+        return self._due_queue
+
+    def _index_delivery(self, delivery_id: int, campaign_id: int, schedule_time: str) -> None:
+        """Record a newly inserted pending delivery."""
+        if self._deliveries_of is None:
+            return  # built lazily from the table on next use
+        self._deliveries_of.setdefault(campaign_id, set()).add(delivery_id)
+        self._delivery_status[delivery_id] = "pending"
+        self._status_counts.setdefault(campaign_id, Counter())["pending"] += 1
+        bisect.insort(self._due_queue, (schedule_time, delivery_id))
+        self._due_time_of[delivery_id] = schedule_time
+
+    def _set_delivery_status(self, delivery_id: int, campaign_id: int, status: str | None) -> None:
+        """Record a status change; None means the delivery row was removed."""
+        if self._deliveries_of is None:
+            return
+        if status is None:
+            old = self._delivery_status.pop(delivery_id, None)
+        else:
+            old = self._delivery_status.get(delivery_id)
+            self._delivery_status[delivery_id] = status
+        # Shift the campaign's tally by one instead of recounting its deliveries
+        tally = self._status_counts.setdefault(campaign_id, Counter())
+        tally[old] -= 1
+        if status is not None:
+            tally[status] += 1
+        if status != "pending":
+            t = self._due_time_of.pop(delivery_id, None)
+            if t is not None:
+                self._due_queue.pop(bisect.bisect_left(self._due_queue, (t, delivery_id)))
 
     # ---------------- Settings ----------------
     def get_setting(self, key: str, default: Any = None) -> Any:
-        with self._lock:
-            row = self.settings_table.get(where("key") == key)
-            return row.get("value") if row else default
+        """A stored setting; served from memory until db.json is rewritten by another process."""
+        with self._locked():
+            if self._settings is None:
+                self._settings = {row.get("key"): row.get("value") for row in self.settings_table}
+            return self._settings.get(key, default)
 
     def set_setting(self, key: str, value: Any) -> None:
-        with self._lock:
+        with self._locked():
             row = self.settings_table.get(where("key") == key)
             if row:
                 self.settings_table.update({"value": value}, doc_ids=[row.doc_id])
             else:
                 self.settings_table.insert({"key": key, "value": value})
+            if self._settings is not None:
+                self._settings[key] = value
 
     def get_timezone(self) -> str | None:
         return self.get_setting("APP_TIMEZONE", None)
@@ -63,57 +503,78 @@ class DatabaseHandler:
 
     # ---------------- User Profile ----------------
     def get_user_profile(self) -> Document | None:
-        with self._lock:
-            rows = self.user_profile_table.all()
-            return rows[0] if rows else None
+        """The single user profile, read by its fixed doc_id (see update_user_profile)."""
+        with self._locked():
+            row = self.user_profile_table.get(doc_id=USER_PROFILE_ID)
+            if row is None:  # written before the fixed id; at most one row either way
+                row = next(iter(self.user_profile_table), None)
+            return row
 
     def update_user_profile(self, data: Document) -> None:
-        with self._lock:
+        with self.transaction():  # clear + insert saved in one write
             self.user_profile_table.truncate()
-            self.user_profile_table.insert(data)
+            self.user_profile_table.insert(TinyDocument(data, doc_id=USER_PROFILE_ID))
 
     # ---------------- Profiles ----------------
     def add_profile(self, name: str, email: str, title: str, profession: str) -> bool:
-        with self._lock:
-            if not self.profiles_table.contains(where("email") == email):
-                self.profiles_table.insert({
-                    "name": name, "email": email, "title": title, "profession": profession,
-                })
-                return True
-            return False
+        with self._locked():
+            if self._profile_emails is None:
+                self._profile_emails = {p.get("email") for p in self.profiles_table.all()}
+            if email in self._profile_emails:
+                return False
+            self.profiles_table.insert({
+                "name": name, "email": email, "title": title, "profession": profession,
+            })
+            self._profile_emails.add(email)
+            return True
 
     def get_all_profiles(self) -> list[Document]:
-        with self._lock:
+        with self._locked():
             return self.profiles_table.all()
 
     def get_profiles_by_ids(self, ids: list[int]) -> list[Document]:
-        with self._lock:
-            results: list[Document] = []
-            for rid in ids or []:
-                row = self.profiles_table.get(doc_id=rid)
-                if row is not None:
-                    results.append(row)
-            return results
+        """Profiles for `ids`, in the order given (unknown ids skipped), fetched in one table read."""
+        if not ids:
+            return []
+        with self._locked():
+            return _rows_by_id(self.profiles_table, ids)
 
     def delete_profile(self, doc_id: int) -> None:
-        with self._lock:
+        with self._locked():
             self.profiles_table.remove(doc_ids=[doc_id])
+            self._profile_emails = None
+
+    def delete_profiles(self, doc_ids: Iterable[int]) -> None:
+        """Remove several profiles with a single write."""
+        with self._locked():
+            self.profiles_table.remove(doc_ids=list(doc_ids))
+            self._profile_emails = None
 
     # ---------------- Templates ----------------
     def add_template(self, name: str, subject: str, body: str) -> bool:
-        with self._lock:
-            if not self.templates_table.contains(where("name") == name):
-                self.templates_table.insert({"name": name, "subject": subject, "body": body})
-                return True
-            return False
+        with self._locked():
+            if self._template_names is None:
+                self._template_names = {t.get("name") for t in self.templates_table.all()}
+            if name in self._template_names:
+                return False
+            self.templates_table.insert({"name": name, "subject": subject, "body": body})
+            self._template_names.add(name)
+            return True
 
     def get_all_templates(self) -> list[Document]:
-        with self._lock:
+        with self._locked():
             return self.templates_table.all()
 
     def delete_template(self, doc_id: int) -> None:
-        with self._lock:
+        with self._locked():
             self.templates_table.remove(doc_ids=[doc_id])
+            self._template_names = None
+
+    def delete_templates(self, doc_ids: Iterable[int]) -> None:
+        """Remove several templates with a single write."""
+        with self._locked():
+            self.templates_table.remove(doc_ids=list(doc_ids))
+            self._template_names = None
 
     # ---------------- Emails (campaigns) ----------------
     def schedule_email(
@@ -132,7 +593,9 @@ class DatabaseHandler:
         subject = str(subject or "")
         body = str(body or "")
 
-        with self._lock:
+        counts = {"total": len(recipients), "pending": len(recipients), "sent": 0, "failed": 0}
+
+        with self.transaction():  # campaign + deliveries saved in one write
             campaign_id = self.emails_table.insert({
                 "subject": subject,
                 "body": body,
@@ -141,22 +604,29 @@ class DatabaseHandler:
                 "sender_profile": sender_profile,
                 "status": "scheduled",
                 "schedule_time": sched_utc,
+                "schedule_time_epoch": iso_to_epoch(sched_utc),
                 "sent_time": None,
                 "reminder_date": reminder_date.isoformat() if reminder_date else None,
+                "reminder_date_epoch": date_to_epoch(reminder_date) if reminder_date else None,
                 "add_signature": add_signature,
                 "attachments": attachments,
-                "counts": {"total": len(recipients), "pending": len(recipients), "sent": 0, "failed": 0},
+                "counts": counts,
+                **_flat_counts(counts),
             })
 
+            # One profile read and one write for all deliveries, not one of each per recipient
+            profiles = {p.doc_id: p for p in _rows_by_id(self.profiles_table, recipients)}
+            rows: list[Document] = []
             for rid in recipients:
-                prof = self.profiles_table.get(doc_id=rid) or {}
+                prof = profiles.get(rid) or {}
                 snapshot = {
                     "name": prof.get("name"),
                     "email": prof.get("email"),
-                    "title": prof.get("title"),
-                    "profession": prof.get("profession"),
+                    # Few distinct values across a campaign: share one str per value
+                    "title": _intern(prof.get("title")),
+                    "profession": _intern(prof.get("profession")),
                 }
-                self.deliveries_table.insert({
+                rows.append({
                     "campaign_id": campaign_id,
                     "recipient_id": rid,
                     "recipient_email": snapshot.get("email"),
@@ -167,103 +637,221 @@ class DatabaseHandler:
                     "sent_time": None,
                     "last_attempt": None,
                 })
+            for delivery_id in self.deliveries_table.insert_multiple(rows):
+                self._index_delivery(delivery_id, campaign_id, sched_utc)
 
-            return campaign_id
+            self._index_email(campaign_id, "scheduled")
+            if reminder_date and self._status_index is not None:
+                self._reminder_ids.add(campaign_id)
+        wake_worker()  # the send worker may be sleeping until a later due time
+        return campaign_id
+
+    def get_all_emails(self) -> list[Document]:
+        """Every campaign row, in table order."""
+        with self._locked():
+            return self.emails_table.all()
 
     def get_campaign(self, campaign_id: int) -> Document | None:
-        with self._lock:
+        with self._locked():
             return self.emails_table.get(doc_id=campaign_id)
 
+    def get_emails_by_status(self, status: str) -> list[Document]:
+        """Campaigns with the given status, fetched by doc_id from the status index."""
+        with self._locked():
+            ids = self._ensure_status_index().get(status, ())
+            return _rows_by_id(self.emails_table, sorted(ids))  # table (doc_id) order
+
+    def get_recent_by_status(
+        self, statuses: Iterable[str], since_epoch: int = 0, limit: int | None = None,
+    ) -> list[Document]:
+        """Completed campaigns in `statuses` sent at/after `since_epoch` (UTC seconds),
+        newest first, at most `limit` rows. Range-scans the sorted sent-time index
+        instead of reading and sorting the whole table.
+        """
+        with self._locked():
+            self._ensure_status_index()
+            runs = []
+            for status in statuses:
+                entries = self._sent_order.get(status, [])
+                start = bisect.bisect_left(entries, (since_epoch, -1))
+                runs.append(reversed(entries[start:]))
+            newest = heapq.merge(*runs, reverse=True)
+            ids = [doc_id for _, doc_id in islice(newest, limit)]
+            if not ids:
+                return []
+            return _rows_by_id(self.emails_table, ids)
+
     def get_scheduled_emails(self) -> list[Document]:
-        with self._lock:
-            Email = Query()
-            return self.emails_table.search(Email.status == "scheduled")
+        """Scheduled campaigns, soonest first (rows without a schedule time last)."""
+        rows = self.get_emails_by_status("scheduled")
+        rows.sort(key=lambda e: (e.get("schedule_time_epoch") is None, e.get("schedule_time_epoch") or 0))
+        return rows
 
     def delete_scheduled_email(self, email_doc_id: int) -> None:
-        """Cancel a scheduled campaign:
+        """Cancel a scheduled campaign (see delete_scheduled_emails)."""
+        self.delete_scheduled_emails([email_doc_id])
+
+    def delete_scheduled_emails(self, email_doc_ids: Iterable[int]) -> None:
+        """Cancel scheduled campaigns:
         - remove only PENDING deliveries (keep sent/failed history)
-        - recompute campaign counts/status
-        - if no deliveries remain at all, remove the campaign row
+        - recompute counts/status of campaigns that still have deliveries
+        - remove the campaign rows that have no deliveries left
+
+        Deliveries are found through the index, and all removals and count
+        updates are saved in one write, however many campaigns are cancelled.
         """
-        with self._lock:
-            Delivery = Query()
-            deliveries = self.deliveries_table.search(Delivery.campaign_id == email_doc_id)
-            pending_ids = [d.doc_id for d in deliveries if d.get("status") == "pending"]
+        with self.transaction():
+            deliveries_of = self._ensure_delivery_index()
+            status_of = self._delivery_status
+            by_campaign = {cid: deliveries_of.get(cid, set()) for cid in email_doc_ids}
+
+            pending_of = {
+                cid: [did for did in ids if status_of.get(did) == "pending"] for cid, ids in by_campaign.items()
+            }
+            pending_ids = [did for dids in pending_of.values() for did in dids]
             if pending_ids:
                 self.deliveries_table.remove(doc_ids=pending_ids)
+                for cid, dids in pending_of.items():
+                    for did in dids:
+                        self._set_delivery_status(did, cid, None)
+                    by_campaign[cid].difference_update(dids)
+
+            emptied: list[int] = []
+            for cid, ids in by_campaign.items():
+                if not ids:
+                    emptied.append(cid)
+                else:
+                    # May become sent/failed/partial now that nothing is pending
+                    self._recompute_campaign_aggregates(cid)
 
-            # Recompute aggregates; may become sent/failed/partial or remain scheduled with fewer pending
-            self._recompute_campaign_aggregates(email_doc_id)
-
-            # If there are literally no deliveries left, delete the campaign
-            remaining = self.deliveries_table.search(Delivery.campaign_id == email_doc_id)
-            if not remaining:
-                self.emails_table.remove(doc_ids=[email_doc_id])
+            emptied = [cid for cid in emptied if self.emails_table.contains(doc_id=cid)]
+            if emptied:
+                self.emails_table.remove(doc_ids=emptied)
+                for cid in emptied:
+                    self._index_email(cid, None)
+                    deliveries_of.pop(cid, None)
+                    self._status_counts.pop(cid, None)
 
     def get_sent_emails(self) -> list[Document]:
-        with self._lock:
-            Email = Query()
-            return self.emails_table.search(Email.status == "sent")
+        return self.get_emails_by_status("sent")
 
     def search_emails(self, search_term: str) -> list[Document]:
-        """Search campaigns that are fully sent, case-insensitive on subject/body."""
-        with self._lock:
-            Email = Query()
-            return self.emails_table.search(
-                (Email.status == "sent") &
-                (
-                    (Email.subject.search(search_term, flags=re.IGNORECASE)) |
-                    (Email.body.search(search_term, flags=re.IGNORECASE))
-                ),
-            )
+        """Search campaigns that are fully sent, case-insensitive on subject/body.
+
+        The term is matched literally (as a substring). Candidates come from the
+        trigram index: only campaigns containing every trigram of the term are
+        checked, so cost follows the number of matches rather than the table size.
+        """
+        # casefold, not lower: matches like re.IGNORECASE does (e.g. "STRASSE" finds "Straße")
+        needle = (search_term or "").casefold()
+        with self._locked():
+            index = self._ensure_search_index()
+            if len(needle) >= 3:
+                postings = sorted((index.get(g, set()) for g in _trigrams(needle)), key=len)
+                candidates = set(postings[0]).intersection(*postings[1:])
+            else:
+                candidates = set(self._search_text)
+            hits = sorted(i for i in candidates if needle in self._search_text[i])
+            return _rows_by_id(self.emails_table, hits)  # table (doc_id) order
 
     # ---------------- Deliveries (per recipient) ----------------
     def get_deliveries_for_campaign(self, campaign_id: int) -> list[Document]:
-        with self._lock:
-            Delivery = Query()
-            return self.deliveries_table.search(Delivery.campaign_id == campaign_id)
-
-    def get_due_deliveries(self) -> list[Document]:
-        """Deliveries that are ready to send now (pending & schedule_time <= now)."""
-        with self._lock:
-            Delivery = Query()
+        with self._locked():
+            ids = self._ensure_delivery_index().get(campaign_id, ())
+            return _rows_by_id(self.deliveries_table, sorted(ids))
+
+    def get_deliveries_for_campaigns(self, campaign_ids: Iterable[int]) -> dict[int, list[Document]]:
+        """Deliveries of several campaigns, fetched together by doc_id (each id maps to a list, maybe empty)."""
+        out: dict[int, list[Document]] = {cid: [] for cid in campaign_ids}
+        if not out:
+            return out
+        with self._locked():
+            deliveries_of = self._ensure_delivery_index()
+            for cid, rows in out.items():
+                rows.extend(_rows_by_id(self.deliveries_table, sorted(deliveries_of.get(cid, ()))))
+        return out
+
+    def get_due_deliveries(self, limit: int | None = None) -> list[Document]:
+        """Deliveries that are ready to send now (pending & schedule_time <= now).
+
+        Served from the due queue: a bisect on the current time finds the due
+        prefix, so only those rows are fetched, not the whole table. With
+        `limit`, only the `limit` longest-overdue deliveries are returned.
+        """
+        with self._locked():
+            queue = self._ensure_due_queue()
             now_iso = now_utc_iso()
-            return self.deliveries_table.search(
-                (Delivery.status == "pending") & (Delivery.schedule_time <= now_iso),
-            )
-
-    def update_delivery_status(self, delivery_id: int, status: str, error: str | None, rendered_body: str | None = None) -> None:
+            if not queue or queue[0][0] > now_iso:
+                return []  # idle: the earliest pending delivery isn't due yet
+            # (now_iso, inf) sorts after every entry whose time is <= now_iso
+            end = bisect.bisect_right(queue, (now_iso, float("inf")))
+            if limit is not None:
+                end = min(end, limit)
+            # Longest-overdue first
+            return _rows_by_id(self.deliveries_table, [did for _, did in queue[:end]])
+
+    def get_next_due_time(self) -> datetime | None:
+        """Earliest schedule_time (UTC) among pending deliveries, or None if nothing is pending."""
+        with self._locked():
+            queue = self._ensure_due_queue()
+            return parse_iso_to_utc(queue[0][0]) if queue else None
+
+    def update_delivery_status(self, delivery_id: int, status: str, error: str | None) -> None:
         """Update a delivery row when an attempt is made; also refresh campaign aggregates."""
-        now_iso = now_utc_iso()
-        with self._lock:
-            patch: dict[str, Any] = {"status": status, "last_attempt": now_iso}
-            if status == "sent":
-                patch["sent_time"] = now_iso
-                patch["error"] = None
-                if rendered_body is not None:
-                    patch["rendered_body"] = rendered_body  # <- NEW: store personalized final text
-            else:
-                patch["error"] = error or "send_error"
-            self.deliveries_table.update(patch, doc_ids=[delivery_id])
+        self.update_delivery_statuses([DeliveryResult(delivery_id, status, error)])
+
+    def update_delivery_statuses(self, results: Iterable[DeliveryResult]) -> None:
+        """Record several send attempts at once.
 
-            delivery = self.deliveries_table.get(doc_id=delivery_id)
-            if not delivery:
-                return
-            self._recompute_campaign_aggregates(delivery["campaign_id"])
+        Every delivery row is patched, then each affected campaign's aggregates
+        are recomputed once, and db.json is written a single time for the lot.
+        Deliveries that no longer exist (e.g. cancelled meanwhile) are skipped.
+        """
+        results = list(results)
+        if not results:
+            return
+        with self.transaction():
+            now_iso = self._now_iso()
+            rows = _rows_by_id(self.deliveries_table, [r.delivery_id for r in results])
+            campaign_of = {d.doc_id: d.get("campaign_id") for d in rows}
+            touched: dict[int, None] = {}  # campaign ids, in first-seen order
+            for r in results:
+                if r.delivery_id not in campaign_of:
+                    continue
+                attempted_at = r.attempted_at or now_iso
+                patch: dict[str, Any] = {"status": r.status, "last_attempt": attempted_at}
+                if r.status == "sent":
+                    patch["sent_time"] = attempted_at
+                    patch["error"] = None
+                else:
+                    patch["error"] = r.error or "send_error"
+                self.deliveries_table.update(patch, doc_ids=[r.delivery_id])
+                self._set_delivery_status(r.delivery_id, campaign_of[r.delivery_id], r.status)
+                touched[campaign_of[r.delivery_id]] = None
+
+            for campaign_id in touched:
+                self._recompute_campaign_aggregates(campaign_id)
 
 
     def _recompute_campaign_aggregates(self, campaign_id: int) -> None:
         """Recalculate counts and final campaign status based on deliveries."""
-        Delivery = Query()
-        deliveries = self.deliveries_table.search(Delivery.campaign_id == campaign_id)
-
-        total = len(deliveries)
-        pending = sum(1 for d in deliveries if d.get("status") == "pending")
-        sent = sum(1 for d in deliveries if d.get("status") == "sent")
-        failed = sum(1 for d in deliveries if d.get("status") == "failed")
+        # O(1) doc_id check first: orphaned deliveries (campaign deleted or never
+        # set) have nothing to aggregate, and TinyDB's update raises on missing ids
+        if campaign_id is None or not self.emails_table.contains(doc_id=campaign_id):
+            return
+        # Tallies are kept current by _index_delivery/_set_delivery_status, so
+        # this is O(1) per campaign; they are rebuilt from the rows whenever the
+        # index is (at startup and after another process writes), so they can't drift
+        ids = self._ensure_delivery_index().get(campaign_id, ())
+        tally = self._status_counts.get(campaign_id) or Counter()
+
+        total = len(ids)
+        pending = tally["pending"]
+        sent = tally["sent"]
+        failed = tally["failed"]
 
         counts = {"total": total, "pending": pending, "sent": sent, "failed": failed}
-        patch: dict[str, Any] = {"counts": counts}
+        patch: dict[str, Any] = {"counts": counts, **_flat_counts(counts)}
 
         if pending == 0:
             if total == 0:
@@ -276,32 +864,56 @@ class DatabaseHandler:
                     status = "failed"
                 else:
                     status = "partial"
+                sent_iso = self._now_iso()
                 patch["status"] = status
-                patch["sent_time"] = now_utc_iso()
+                patch["sent_time"] = sent_iso
+                patch["sent_time_epoch"] = iso_to_epoch(sent_iso)
 
         self.emails_table.update(patch, doc_ids=[campaign_id])
+        if "status" in patch:
+            self._index_email(campaign_id, patch["status"], patch["sent_time_epoch"])
 
     # Back-compat helper (legacy)
     def get_due_emails(self) -> list[Document]:
-        with self._lock:
-            Email = Query()
-            now_iso = now_utc_iso()
-            return self.emails_table.search(
-                (Email.status == "scheduled") & (Email.schedule_time <= now_iso),
-            )
+        """Scheduled campaigns whose schedule time has passed (from the status index)."""
+        now_epoch = iso_to_epoch(now_utc_iso())
+        return [
+            e for e in self.get_emails_by_status("scheduled")
+            if e.get("schedule_time_epoch") is not None and e["schedule_time_epoch"] <= now_epoch
+        ]
 
     # ---------------- Reminders ----------------
     def set_email_reminder(self, email_doc_id: int, reminder_date: date) -> None:
-        with self._lock:
+        with self._locked():
             self.emails_table.update(
-                {"reminder_date": reminder_date.isoformat()},
+                {"reminder_date": reminder_date.isoformat(), "reminder_date_epoch": date_to_epoch(reminder_date)},
                 doc_ids=[email_doc_id],
             )
+            if self._status_index is not None:
+                self._reminder_ids.add(email_doc_id)
 
     def clear_email_reminder(self, email_doc_id: int) -> None:
-        with self._lock:
-            self.emails_table.update({"reminder_date": None}, doc_ids=[email_doc_id])
+        with self._locked():
+            self.emails_table.update({"reminder_date": None, "reminder_date_epoch": None}, doc_ids=[email_doc_id])
+            self._reminder_ids.discard(email_doc_id)
+
+    def get_emails_with_reminder(self) -> list[Document]:
+        """Campaigns that have a follow-up reminder set (from the reminder index), soonest first."""
+        with self._locked():
+            self._ensure_status_index()
+            rows = _rows_by_id(self.emails_table, sorted(self._reminder_ids))
+        # Stored as YYYY-MM-DD, so the strings sort as dates
+        rows.sort(key=lambda e: e["reminder_date"])
+        return rows
+
+    def get_sendable_without_reminder(self) -> list[Document]:
+        """Sent or partial campaigns without a reminder yet (candidates for one)."""
+        with self._locked():
+            index = self._ensure_status_index()
+            ids = (index.get("sent", set()) | index.get("partial", set())) - self._reminder_ids
+            return _rows_by_id(self.emails_table, sorted(ids))
 
     def close_db(self) -> None:
-        with self._lock:
+        with self._locked():
             self.db.close()
+        self._generation.close()
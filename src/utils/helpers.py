@@ -1,5 +1,7 @@
 import os
+import re
 import smtplib
+from functools import lru_cache
 from typing import Any
 
 import yagmail
@@ -9,61 +11,215 @@ from loguru import logger
 # Load environment variables from the .env file in the project root
 load_dotenv()
 
+_PLACEHOLDER_RE = re.compile(r"\{([^{}]+)\}")
+
+
+@lru_cache(maxsize=128)
+def _compile_template(body_template: str) -> tuple[str, ...]:
+    """Split a body once into alternating literal text and placeholder keys.
+
+    Even indexes are literal text, odd indexes are keys. Cached per body string,
+    so a campaign's many recipients (and preview reruns) share one scan.
+    """
+    if "{" not in body_template:
+        return (body_template,)  # broadcast body: skip the regex scan
+    return tuple(_PLACEHOLDER_RE.split(body_template))
+
+
+def sender_placeholders(sender_profile: dict[str, Any] | None) -> dict[str, Any]:
+    """Sender fields keyed as placeholders ({my_name}, {my_signature}, ...).
+
+    Build once per sender and pass to render_email_body(sender_fields=...) when
+    rendering many recipients, instead of re-prefixing the profile per call.
+    """
+    return {f"my_{k}": v for k, v in (sender_profile or {}).items()}
+
+
+@lru_cache(maxsize=4096)
+def attachment_name(path: str) -> str:
+    """File name shown for a stored attachment path (memoized; the same paths recur every rerun)."""
+    return os.path.basename(path)
+
+
+def specialize_template(
+    body_template: str,
+    sender_fields: dict[str, Any],
+    include_signature: bool = True,
+) -> tuple[str, ...]:
+    """Pre-fill everything in a body that is fixed for a whole campaign.
+
+    Sender placeholders (which win over recipient fields) and the signature are
+    merged into the literal text, leaving segments in the `_compile_template`
+    layout that hold only the keys a recipient can fill. Build once per
+    campaign, then call fill_template per recipient.
+    """
+    parts = _compile_template(body_template or "")
+    signature = sender_fields.get("my_signature", "") if include_signature else ""
+    if len(parts) == 1 and not signature:
+        return parts  # no placeholders, no signature: the body goes out as typed
+    out = [parts[0]]
+    for i in range(1, len(parts), 2):
+        key = parts[i]
+        if key in sender_fields:
+            out[-1] = f"{out[-1]}{sender_fields[key]}{parts[i + 1]}"
+        else:
+            out += (key, parts[i + 1])
+    if signature:
+        out[-1] = f"{out[-1]}\n\n--\n{signature}"
+    return tuple(out)
+
+
+def fill_template(segments: tuple[str, ...], recipient_profile: dict[str, Any]) -> str:
+    """Render specialize_template() segments for one recipient; unknown {keys} stay as typed."""
+    if len(segments) == 1:
+        return segments[0]  # no placeholders left: nothing to copy or join
+    recipient = recipient_profile or {}
+    parts = list(segments)
+    for i in range(1, len(parts), 2):
+        key = parts[i]
+        parts[i] = str(recipient[key]) if key in recipient else f"{{{key}}}"
+    return "".join(parts)
+
 
 def render_email_body(
     body_template: str,
     recipient_profile: dict[str, Any],
-    sender_profile: dict[str, Any],
+    sender_profile: dict[str, Any] | None = None,
     include_signature: bool = True,
+    *,
+    sender_fields: dict[str, Any] | None = None,
 ) -> str:
     """Render the email body by replacing placeholders with recipient and sender fields.
     - Recipient fields: {name}, {email}, {title}, {profession}, ...
     - Sender fields (prefixed with my_): {my_name}, {my_title}, {my_profession}, ...
+    Pass either `sender_profile` or its precomputed `sender_placeholders()`.
+    When rendering a campaign for many recipients, specialize_template once and
+    fill_template per recipient instead.
     """
-    rendered = body_template or ""
-    sender_prefixed = {f"my_{k}": v for k, v in (sender_profile or {}).items()}
-    data = {**(recipient_profile or {}), **sender_prefixed}
-
-    for key, value in data.items():
-        rendered = rendered.replace(f"{{{key}}}", str(value))
-
-    if include_signature:
-        signature = (sender_profile or {}).get("signature", "")
-        if signature:
-            rendered = f"{rendered}\n\n--\n{signature}"
-
-    return rendered
+    if sender_fields is None:
+        sender_fields = sender_placeholders(sender_profile)
+    segments = specialize_template(body_template, sender_fields, include_signature)
+    return fill_template(segments, recipient_profile)
+
+
+# Most specific class wins: _map_smtp_error walks the exception's MRO
+_SMTP_ERROR_CODES: dict[type, str] = {
+    smtplib.SMTPAuthenticationError: "auth_error",
+    smtplib.SMTPRecipientsRefused: "invalid_recipient",
+    smtplib.SMTPSenderRefused: "sender_refused",
+    smtplib.SMTPConnectError: "connect_error",
+    smtplib.SMTPHeloError: "helo_error",
+    smtplib.SMTPException: "smtp_error",
+}
+# SMTPDataError is classified by its reply code instead
+_SMTP_DATA_ERROR_CODES: dict[int, str] = {
+    421: "temp_rate_limited", 451: "temp_rate_limited", 452: "temp_rate_limited",
+    550: "mailbox_unavailable", 551: "mailbox_unavailable",
+    552: "mailbox_unavailable", 553: "mailbox_unavailable",
+    554: "transaction_failed",
+}
 
 
 def _map_smtp_error(e: Exception) -> str:
     """Map smtplib / transport exceptions to concise error codes for logs/UI."""
-    if isinstance(e, smtplib.SMTPAuthenticationError):
-        return "auth_error"
-    if isinstance(e, smtplib.SMTPRecipientsRefused):
-        return "invalid_recipient"
-    if isinstance(e, smtplib.SMTPSenderRefused):
-        return "sender_refused"
-
     if isinstance(e, smtplib.SMTPDataError):
-        code = getattr(e, "smtp_code", None)
-        if code in (421, 451, 452):
-            return "temp_rate_limited"
-        if code in (550, 551, 552, 553):
-            return "mailbox_unavailable"
-        if code == 554:
-            return "transaction_failed"
-        return "data_error"
-
-    if isinstance(e, smtplib.SMTPConnectError):
-        return "connect_error"
-    if isinstance(e, smtplib.SMTPHeloError):
-        return "helo_error"
-    if isinstance(e, smtplib.SMTPException):
-        return "smtp_error"
-
+        return _SMTP_DATA_ERROR_CODES.get(getattr(e, "smtp_code", None), "data_error")
+    for cls in type(e).__mro__:
+        code = _SMTP_ERROR_CODES.get(cls)
+        if code:
+            return code
     return "send_error"
 
 
+class SmtpSession:
+    """One authenticated Gmail connection reused for several sends.
+
+    yagmail's `send()` logs in again on every call, so a batch of N emails costs
+    N TLS handshakes and N logins. This logs in once, lazily on the first send,
+    and pushes each message over the same connection with `sendmail`; a dropped
+    connection is re-established once before the send is reported as failed.
+    Use as a context manager so the connection is always closed.
+    """
+
+    def __init__(self) -> None:
+        self._yag: yagmail.SMTP | None = None
+        self._attachment_ok: dict[str, bool] = {}  # path -> exists, checked once per session
+
+    def __enter__(self) -> "SmtpSession":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _connect(self) -> yagmail.SMTP:
+        if self._yag is None:
+            sender_email = os.getenv("EMAIL_SENDER")
+            sender_password = os.getenv("EMAIL_PASS")
+            if not sender_email or not sender_password:
+                raise ValueError("missing_sender_creds")
+            yag = yagmail.SMTP(sender_email, sender_password)
+            yag.login()
+            self._yag = yag
+        return self._yag
+
+    def send(
+        self,
+        to: str | list[str],
+        subject: str,
+        contents: str | list[Any],
+        attachments: list[str] | None = None,
+        *,
+        is_html: bool = False,  # kept for future branching if needed
+    ) -> tuple[bool, str | None]:
+        """Send one email over this session. Returns (ok, error_code) like send_email."""
+        try:
+            yag = self._connect()
+
+            # Filter out missing attachments for safety; a campaign's recipients
+            # share its attachments, so each path is stat()ed once per session
+            if attachments:
+                attachments = [p for p in attachments if p and self._attachment_exists(p)] or None
+
+            # yagmail auto-detects HTML if contents looks like HTML; is_html flag reserved for future logic
+            recipients, msg_string = yag.prepare_send(
+                to=to,
+                subject=subject,
+                contents=contents,
+                attachments=attachments,
+            )
+            try:
+                yag.smtp.sendmail(yag.user, recipients, msg_string)
+            except smtplib.SMTPServerDisconnected:
+                yag.login()
+                yag.smtp.sendmail(yag.user, recipients, msg_string)
+
+            logger.success(f"Email successfully sent to: {to}")
+            return True, None
+
+        except Exception as e:
+            code = _map_smtp_error(e) if not isinstance(e, ValueError) else str(e)
+            logger.error(f"Send error to {to}: {code} ({e!s})")
+            if isinstance(e, (smtplib.SMTPServerDisconnected, smtplib.SMTPAuthenticationError)):
+                self.close()  # start over with a fresh login on the next send
+            return False, code
+
+    def _attachment_exists(self, path: str) -> bool:
+        ok = self._attachment_ok.get(path)
+        if ok is None:
+            ok = self._attachment_ok[path] = os.path.exists(path)
+        return ok
+
+    def close(self) -> None:
+        if self._yag is None:
+            return
+        try:
+            self._yag.close()
+        except Exception as close_err:
+            logger.warning(f"SMTP close error (non-fatal): {close_err!s}")
+        finally:
+            self._yag = None
+
+
 def send_email(
     to: str | list[str],
     subject: str,
@@ -71,42 +227,14 @@ def send_email(
     attachments: list[str] | None = None,
     *,
     is_html: bool = False,  # kept for future branching if needed
+    session: SmtpSession | None = None,
 ) -> tuple[bool, str | None]:
     """Send an email using Gmail via yagmail with credentials from .env.
     Returns (ok, error_code). error_code is None on success.
+    Pass an open `session` to reuse its connection; otherwise a one-off
+    connection is opened and closed around this single email.
     """
-    yag_connection = None
-    try:
-        sender_email = os.getenv("EMAIL_SENDER")
-        sender_password = os.getenv("EMAIL_PASS")
-
-        if not sender_email or not sender_password:
-            raise ValueError("missing_sender_creds")
-
-        # Filter out missing attachments for safety
-        if attachments:
-            attachments = [p for p in attachments if p and os.path.exists(p)] or None
-
-        yag_connection = yagmail.SMTP(sender_email, sender_password)
-        # yagmail auto-detects HTML if contents looks like HTML; is_html flag reserved for future logic
-        yag_connection.send(
-            to=to,
-            subject=subject,
-            contents=contents,
-            attachments=attachments,
-        )
-
-        logger.success(f"Email successfully sent to: {to}")
-        return True, None
-
-    except Exception as e:
-        code = _map_smtp_error(e) if not isinstance(e, ValueError) else str(e)
-        logger.error(f"Send error to {to}: {code} ({e!s})")
-        return False, code
-
-    finally:
-        if yag_connection:
-            try:
-                yag_connection.close()
-            except Exception as close_err:
-                logger.warning(f"SMTP close error (non-fatal): {close_err!s}")
+    if session is not None:
+        return session.send(to, subject, contents, attachments, is_html=is_html)
+    with SmtpSession() as one_off:
+        return one_off.send(to, subject, contents, attachments, is_html=is_html)
@@ -0,0 +1,103 @@
+"""Change notifications between the UI and the send worker over Linux eventfds.
+
+`run_app.py` creates two eventfds and hands them to both children, with their
+numbers in environment variables:
+
+- EMAIL_APP_NOTIFY_FD (worker -> UI): the send worker bumps it after each
+  delivery it records; the Streamlit process blocks on it in a daemon thread
+  and counts wake-ups, so pages can rerun when new data lands instead of
+  polling db.json.
+- EMAIL_APP_WAKE_FD (UI -> worker): DatabaseHandler.schedule_email bumps it,
+  so the worker stops sleeping and picks up "send now" campaigns immediately.
+
+Without the variables (e.g. `streamlit run` on its own, or no eventfd support)
+both sides are no-ops and the worker falls back to its poll interval.
+"""
+import os
+import select
+import threading
+import time
+
+NOTIFY_FD_ENV = "EMAIL_APP_NOTIFY_FD"
+WAKE_FD_ENV = "EMAIL_APP_WAKE_FD"
+
+_generation = 0
+_listener: threading.Thread | None = None
+_listener_lock = threading.Lock()
+
+
+def _fd_from_env(name: str) -> int | None:
+    raw = os.getenv(name)
+    return int(raw) if raw and raw.isdigit() else None
+
+
+def _notify_fd() -> int | None:
+    return _fd_from_env(NOTIFY_FD_ENV)
+
+
+def notify_data_changed() -> None:
+    """Tell the UI process that the database changed (worker side)."""
+    fd = _notify_fd()
+    if fd is None:
+        return
+    try:
+        os.eventfd_write(fd, 1)
+    except OSError:
+        pass  # UI gone or fd not inherited; it will catch up on the next rerun
+
+
+def _listen(fd: int) -> None:
+    global _generation
+    while True:
+        try:
+            os.eventfd_read(fd)  # blocks until the worker writes; drains the counter
+        except OSError:
+            return
+        _generation += 1
+
+
+def data_generation() -> int | None:
+    """Number of worker notifications seen by this process (UI side).
+
+    Starts the listener thread on first use. Returns None when no notification
+    channel was set up, so callers can skip live refresh entirely.
+    """
+    global _listener
+    fd = _notify_fd()
+    if fd is None:
+        return None
+    with _listener_lock:
+        if _listener is None:
+            _listener = threading.Thread(target=_listen, args=(fd,), name="db-notify", daemon=True)
+            _listener.start()
+    return _generation
+
+
+def wake_worker() -> None:
+    """Tell the send worker that new deliveries were scheduled (UI side)."""
+    fd = _fd_from_env(WAKE_FD_ENV)
+    if fd is None:
+        return
+    try:
+        os.eventfd_write(fd, 1)
+    except OSError:
+        pass  # worker gone; it will find the deliveries on its next poll
+
+
+def wait_for_wake(timeout: float) -> bool:
+    """Sleep up to `timeout` seconds, returning early if the UI calls wake_worker (worker side).
+
+    Returns True when woken. Without a wake channel this is a plain sleep.
+    """
+    fd = _fd_from_env(WAKE_FD_ENV)
+    if fd is None:
+        time.sleep(timeout)
+        return False
+    try:
+        ready, _, _ = select.select([fd], [], [], timeout)
+        if ready:
+            os.eventfd_read(fd)  # drain, so several wakes collapse into one
+        return bool(ready)
+    except OSError:
+        time.sleep(timeout)
+        return False
@@ -1,5 +1,6 @@
 import os
-from datetime import UTC, datetime, timezone
+from datetime import UTC, date, datetime, time, timezone
+from functools import lru_cache
 from zoneinfo import ZoneInfo
 
 _DEF_TZ = "Europe/Rome"  # default local timezone for UI and for naive inputs
@@ -14,42 +15,76 @@ def _env_tzname() -> str:
     # Read from dotenv-loaded environment, fallback to default
     return os.getenv("APP_TIMEZONE", _DEF_TZ)
 
-def get_app_tz() -> ZoneInfo | timezone:
-    """Resolve the app's local timezone: runtime override → env → UTC fallback."""
-    tzname = _RUNTIME_TZ or _env_tzname()
+def _app_tzname() -> str:
+    return _RUNTIME_TZ or _env_tzname()
+
+@lru_cache(maxsize=16)
+def _resolve_tz(tzname: str) -> ZoneInfo | timezone:
+    # Keyed by name, so set_runtime_tz needs no invalidation: a new name is a new key
     try:
         return ZoneInfo(tzname)
     except Exception:
         return UTC  # safe fallback
 
+@lru_cache(maxsize=64)
+def is_valid_tz(tzname: str) -> bool:
+    """Whether `tzname` is a known IANA zone; invalid names are remembered too, not re-looked-up on disk."""
+    try:
+        ZoneInfo(tzname)
+        return True
+    except Exception:
+        return False
+
+def get_app_tz() -> ZoneInfo | timezone:
+    """Resolve the app's local timezone: runtime override → env → UTC fallback."""
+    return _resolve_tz(_app_tzname())
+
 def now_utc() -> datetime:
     return datetime.now(UTC)
 
 def now_utc_iso() -> str:
-    # Store with trailing 'Z' for UTC clarity
-    return now_utc().isoformat().replace("+00:00", "Z")
+    # Store with trailing 'Z' for UTC clarity; fixed width (always microseconds)
+    # so stored timestamps compare and sort correctly as plain strings
+    return now_utc().isoformat(timespec="microseconds").replace("+00:00", "Z")
 
 def to_utc_iso(dt: datetime) -> str:
-    """Convert a datetime to UTC ISO string (with 'Z').
+    """Convert a datetime to a fixed-width UTC ISO string (with 'Z').
     If 'dt' is naive, interpret it in the app timezone first.
     """
     if dt.tzinfo is None:
         dt = dt.replace(tzinfo=get_app_tz())
-    return dt.astimezone(UTC).isoformat().replace("+00:00", "Z")
+    return dt.astimezone(UTC).isoformat(timespec="microseconds").replace("+00:00", "Z")
+
+def date_to_epoch(d: date) -> int:
+    """Epoch seconds of a calendar date's UTC midnight; orders dates as plain ints."""
+    return int(datetime.combine(d, time(), UTC).timestamp())
+
+def iso_to_epoch(s: str | None) -> int | None:
+    """UTC epoch seconds for a stored ISO string (None if empty)."""
+    dt = parse_iso_to_utc(s)
+    return int(dt.timestamp()) if dt else None
 
 def parse_iso_to_utc(s: str | None) -> datetime | None:
     """Parse any ISO string (with or without 'Z') to an aware UTC datetime."""
     if not s:
         return None
-    s2 = s.replace("Z", "+00:00")
-    dt = datetime.fromisoformat(s2)
+    dt = datetime.fromisoformat(s)  # Python 3.11+ accepts the trailing 'Z' natively
+    if dt.tzinfo is UTC:
+        return dt  # our own 'Z' timestamps: already UTC, skip the conversion
     if dt.tzinfo is None:
-        dt = dt.replace(tzinfo=UTC)
+        return dt.replace(tzinfo=UTC)
     return dt.astimezone(UTC)
 
+@lru_cache(maxsize=8192)
+def _parse_iso_to_local_cached(s: str, tzname: str) -> datetime:
+    # Keyed on the tz name so a timezone change never serves stale conversions;
+    # datetimes are immutable, so sharing cached instances is safe.
+    return parse_iso_to_utc(s).astimezone(_resolve_tz(tzname))
+
 def parse_iso_to_local(s: str | None) -> datetime | None:
-    """Parse ISO string to a datetime in the app timezone (aware)."""
-    utc_dt = parse_iso_to_utc(s)
-    if not utc_dt:
+    """Parse ISO string to a datetime in the app timezone (aware).
+    Results are memoized: pages re-render the same stored timestamps on every rerun.
+    """
+    if not s:
         return None
-    return utc_dt.astimezone(get_app_tz())
+    return _parse_iso_to_local_cached(s, _app_tzname())
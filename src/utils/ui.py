@@ -1,9 +1,11 @@
+import heapq
 import os
-from zoneinfo import ZoneInfo
+from typing import Any
 
 import streamlit as st
 
-from utils.time import set_runtime_tz  # NEW
+from utils.notify import data_generation
+from utils.time import is_valid_tz, parse_iso_to_local, set_runtime_tz
 
 COMMON_TZS = [
     "Europe/Rome",
@@ -19,13 +21,42 @@ COMMON_TZS = [
     "Australia/Sydney",
 ]
 
-def render_settings_sidebar(db) -> None:
-    """Tiny settings sidebar for app timezone, persisted in TinyDB."""
-    with st.sidebar.expander("⚙️ Settings", expanded=False):
-        saved_tz = db.get_timezone() or os.getenv("APP_TIMEZONE") or "Europe/Rome"
+LIVE_REFRESH_SECONDS = 2.0
+
+DELIVERY_LOG_LIMIT = 50  # rows per page of a campaign log; the earliest attempts come first
+STATUS_BADGES: dict[str, str] = {
+    "sent": "✅ **sent**",
+    "partial": "🟡 **partial**",
+    "failed": "❌ **failed**",
+    "scheduled": "🕒 **scheduled**",
+}
+LOG_TIME_FMT = "%Y-%m-%d %H:%M"
+
 
-        # Ensure current process uses the saved timezone immediately
-        set_runtime_tz(saved_tz)
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def _rerun_on_worker_update() -> None:
+    # Fragment reruns only compare two in-memory ints; the full page (and its
+    # DB reads) reruns just when the worker has signalled new deliveries.
+    gen = data_generation()
+    seen = st.session_state.setdefault("_seen_data_generation", gen)
+    if gen != seen:
+        st.session_state["_seen_data_generation"] = gen
+        st.rerun(scope="app")
+
+
+def enable_live_refresh() -> None:
+    """Rerun the page when the send worker records deliveries (needs run_app.py's notify channel)."""
+    if data_generation() is not None:
+        _rerun_on_worker_update()
+
+
+@st.fragment
+def _settings_panel(db) -> None:
+    # A fragment: picking/typing a timezone reruns only this panel, not the page
+    with st.expander("⚙️ Settings", expanded=False):
+        saved_tz = db.get_timezone() or os.getenv("APP_TIMEZONE") or "Europe/Rome"
+        # No set_runtime_tz here: every page applies the saved zone before
+        # rendering, and the Save handler below applies a new one immediately
 
         st.caption("Local Timezone (for display and interpreting naive inputs)")
         default_index = COMMON_TZS.index(saved_tz) if saved_tz in COMMON_TZS else 0
@@ -34,11 +65,63 @@ def render_settings_sidebar(db) -> None:
 
         if st.button("Save timezone"):
             tzname = (custom or choice).strip()
-            try:
-                ZoneInfo(tzname)  # validate
+            if is_valid_tz(tzname):
                 db.set_timezone(tzname)
                 set_runtime_tz(tzname)  # immediate effect, no env mutation
                 st.success(f"Timezone set to {tzname}.")
-                st.rerun()
-            except Exception:
+                st.rerun(scope="app")  # page times must be re-rendered in the new zone
+            else:
                 st.error("Invalid timezone. Use a valid IANA name like Europe/Berlin.")
+
+
+def render_settings_sidebar(db) -> None:
+    """Tiny settings sidebar for app timezone, persisted in TinyDB."""
+    with st.sidebar:
+        _settings_panel(db)
+
+
+def status_badge(status: str) -> str:
+    """Markdown badge (icon + bold label) for a campaign status; unknown ones are just bolded."""
+    return STATUS_BADGES.get((status or "").lower(), f"**{status}**")
+
+
+def display_delivery_log(deliveries: list[dict[str, Any]], key: str) -> None:
+    """Render one page of a campaign's per-recipient delivery log.
+
+    `deliveries` are the campaign's rows from the `deliveries` table, in any
+    order; they are shown by last attempt (or sent time), `DELIVERY_LOG_LIMIT`
+    per page. `key` is a unique widget-key prefix for the page selector.
+    """
+    if not deliveries:
+        st.info("No delivery entries for this campaign yet.")
+        return
+    st.write("**Delivery log:**")
+    offset = 0
+    if len(deliveries) > DELIVERY_LOG_LIMIT:
+        pages = -(-len(deliveries) // DELIVERY_LOG_LIMIT)
+        page_key = f"{key}_page"
+        if st.session_state.get(page_key, 1) > pages:
+            st.session_state[page_key] = pages  # the log shrank since the page was picked
+        page = st.number_input("Log page", min_value=1, max_value=pages, key=page_key)
+        offset = (page - 1) * DELIVERY_LOG_LIMIT
+        shown_to = min(offset + DELIVERY_LOG_LIMIT, len(deliveries))
+        st.caption(f"Showing deliveries {offset + 1}-{shown_to} of {len(deliveries)} (page {page} of {pages}).")
+    # Attempt order (by last_attempt/sent_time); heap-select up to the end of
+    # the page rather than sorting the whole log
+    deliveries_sorted = heapq.nsmallest(
+        offset + DELIVERY_LOG_LIMIT,
+        deliveries,
+        key=lambda d: d.get("last_attempt") or d.get("sent_time") or "",
+    )[offset:]
+    for row in deliveries_sorted:
+        snap = row.get("recipient_snapshot") or {}
+        rname = snap.get("name") or "Unknown"
+        remail = row.get("recipient_email") or "—"
+        rstatus = row.get("status", "—")
+        rtime_local = parse_iso_to_local(row.get("sent_time") or row.get("last_attempt"))
+        rtime_str = rtime_local.strftime(LOG_TIME_FMT) if rtime_local else "—"
+        rerr = row.get("error") or "—"
+        st.markdown(
+            f"- `{rname}` <{remail}> — **{rstatus}** at `{rtime_str}`"
+            + (f" · error: `{rerr}`" if rerr and rerr != "—" else ""),
+        )
@@ -0,0 +1,39 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from utils.db import DatabaseHandler  # noqa: E402
+
+
+def test_raising_transaction_leaves_db_file_unchanged(tmp_path):
+    db_file = tmp_path / "db.json"
+    db = DatabaseHandler(str(db_file))
+    assert db.add_profile("Ada", "ada@example.com", "Dr.", "Engineer")
+    before = db_file.read_bytes()
+
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            assert db.add_profile("Bob", "bob@example.com", "Mr.", "Writer")
+            with db.transaction():
+                db.add_template("Intro", "Hello", "Hi {name}")
+            raise RuntimeError("abort")
+
+    assert db_file.read_bytes() == before
+    assert [p["email"] for p in db.get_all_profiles()] == ["ada@example.com"]
+    # The dropped rows are gone from the indexes too, so they can be added again
+    assert db.add_profile("Bob", "bob@example.com", "Mr.", "Writer")
+    assert db.add_template("Intro", "Hello", "Hi {name}")
+
+
+def test_rows_by_id_returns_copies(tmp_path):
+    db = DatabaseHandler(str(tmp_path / "db.json"))
+    db.deliveries_table.insert({"campaign_id": 7, "status": "pending", "recipient_snapshot": {"name": "Ada"}})
+
+    row = db.get_deliveries_for_campaigns([7])[7][0]
+    row["recipient_snapshot"]["name"] = "Bob"
+
+    again = db.get_deliveries_for_campaigns([7])[7][0]
+    assert again["recipient_snapshot"] == {"name": "Ada"}